@@ -0,0 +1,130 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: АССЕТЫ
+# ===============================
+# Один кэш на все картинки/шрифты/музыку: грузим при первом
+# обращении, храним по (путь, размер), неудачи тоже запоминаем,
+# чтобы не долбить диск каждый кадр. Фоны далёких званий можно
+# выгрузить — на экране всегда только один.
+
+import os
+import sys
+import threading
+
+import pygame
+
+
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        # рядом с модулем, а не в cwd: бенчмарк и запуск из другой папки
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def run_in_background(job, name="asset-loader"):
+    t = threading.Thread(target=job, name=name, daemon=True)
+    t.start()
+    return t
+
+
+class AssetCache:
+    def __init__(self, resolve=resource_path):
+        self.resolve = resolve
+        self.loads = 0
+        self._images = {}  # (name, size) -> Surface | None
+        self._decoded = {}  # (name, size) -> Surface без convert() (prefetch)
+        # prefetch пишет _decoded из фонового потока, image()/evict_images()
+        # трогают кэши из главного — все обращения к словарям под замком
+        self._lock = threading.Lock()
+        self._fonts = {}   # (name, size) -> Font
+
+    # -------------------------
+    # IMAGES
+    # -------------------------
+    def image(self, name, size=None):
+        key = (name, tuple(size) if size else None)
+        with self._lock:
+            if key in self._images:
+                return self._images[key]
+            img = self._decoded.pop(key, None)
+
+        if img is not None:
+            img = img.convert()
+        else:
+            try:
+                img = pygame.image.load(self.resolve(name)).convert()
+                if size:
+                    img = pygame.transform.scale(img, size)
+                with self._lock:
+                    self.loads += 1
+            except Exception as e:
+                print(f"[WARN] Image load failed: {name} -> {e}")
+        with self._lock:
+            self._images[key] = img
+        return img
+
+    def prefetch(self, names, size=None):
+        """Декодировать картинки заранее (можно из фонового потока).
+
+        convert() под формат экрана остаётся главному потоку в image():
+        это дёшево по сравнению с распаковкой JPEG.
+        """
+        size = tuple(size) if size else None
+        for name in names:
+            key = (name, size)
+            with self._lock:
+                if key in self._images or key in self._decoded:
+                    continue
+            try:
+                # распаковка — без замка, она и есть долгая часть
+                img = pygame.image.load(self.resolve(name))
+                if size:
+                    img = pygame.transform.scale(img, size)
+                with self._lock:
+                    self._decoded[key] = img
+                    self.loads += 1
+            except Exception as e:
+                print(f"[WARN] Image prefetch failed: {name} -> {e}")
+
+    def evict_images(self, keep):
+        """Выгрузить все картинки, чьих имён нет в keep."""
+        with self._lock:
+            for key in [k for k in self._images if k[0] not in keep]:
+                del self._images[key]
+            for key in [k for k in self._decoded if k[0] not in keep]:
+                del self._decoded[key]
+
+    def cached_images(self):
+        with self._lock:
+            return [k for k, v in self._images.items() if v is not None]
+
+    # -------------------------
+    # FONTS
+    # -------------------------
+    def font(self, name, size):
+        key = (name, size)
+        f = self._fonts.get(key)
+        if f is None:
+            try:
+                f = pygame.font.Font(self.resolve(name), size)
+                self.loads += 1
+            except Exception:
+                f = pygame.font.SysFont("arial", size)
+            self._fonts[key] = f
+        return f
+
+    # -------------------------
+    # MUSIC
+    # -------------------------
+    def music(self, name, volume=0.4):
+        # mixer.music стримит файл сам, кэшировать нечего — только старт
+        try:
+            pygame.mixer.music.load(self.resolve(name))
+            pygame.mixer.music.set_volume(volume)
+            pygame.mixer.music.play(-1)
+            self.loads += 1
+            return True
+        except Exception as e:
+            print(f"[WARN] Music load failed: {name} -> {e}")
+            return False
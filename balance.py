@@ -0,0 +1,351 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: БАЛАНС (МОНТЕ-КАРЛО)
+# ===============================
+# Тысячи headless-прохождений GameSimulation с разными сидами и
+# ботами-стратегиями на всех ядрах (multiprocessing). На выходе —
+# распределения: время до званий и первого престижа, доля выигранных
+# проверок, кривая заработка. Константы можно подменить на прогон,
+# чтобы увидеть, как сдвинется баланс ДО правки simulation.py.
+#
+#   python balance.py                                  # все боты, 200 прогонов каждый
+#   python balance.py -b clicker idle -n 2000 -t 7200
+#   python balance.py --set PRESTIGE_MIN_SALARY=200000 --set sorter.bps=0.4
+#   python balance.py --csv balance.csv -o balance.json
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import simulation
+from perf import percentile
+from simulation import GameSimulation, RANKS
+
+# -------------------------
+# STRATEGIES
+# -------------------------
+# cps        — кликов в секунду (0 — только пассив)
+# taisher    — кликать только в Тащер-окне (x5)
+# buy        — "best": здание с лучшим bps/цена, "cheapest": самое дешёвое,
+#              "auto": всё покупает simulation.AutoBuyer (и мета-магазин тоже)
+# kpi        — покупать KPI до kpi_cap, пока остаётся kpi_reserve x цена
+# prestige_at — престиж, когда зарплата >= PRESTIGE_MIN_SALARY * prestige_at
+# meta       — порядок покупок в мета-магазине после престижа
+STRATEGIES = {
+    "idle": {"cps": 0.0, "taisher": False, "buy": "cheapest", "kpi": False,
+             "prestige_at": 1.0, "meta": ["income", "cheap"]},
+    "clicker": {"cps": 6.0, "taisher": False, "buy": "best", "kpi": False,
+                "prestige_at": 1.0, "meta": ["income", "cheap"]},
+    "taisher": {"cps": 8.0, "taisher": True, "buy": "best", "kpi": False,
+                "prestige_at": 1.0, "meta": ["taisher", "income", "cheap"]},
+    "kpi_rush": {"cps": 6.0, "taisher": False, "buy": "best", "kpi": True, "kpi_reserve": 3.0, "kpi_cap": 100,
+                 "prestige_at": 1.0, "meta": ["income", "cheap"]},
+    "autobuy": {"cps": 6.0, "taisher": False, "buy": "auto", "kpi": False,
+                "prestige_at": 1.0, "meta": []},
+    "hoarder": {"cps": 6.0, "taisher": False, "buy": "best", "kpi": False,
+                "prestige_at": 4.0, "meta": ["income", "cheap"]},
+}
+
+DECIDE_EVERY = 1.0  # сек между решениями бота о покупках
+SAMPLE_EVERY = 300.0  # сек между точками кривой заработка
+PCTS = (10, 50, 90)
+
+
+def _affordable(sim, idx):
+    b = sim.buildings[idx]
+    return b.price(sim.discount_mult()) <= sim.state["salary"]
+
+
+def _pick_building(sim, how):
+    disc = sim.discount_mult()
+    offers = [(i, b.price(disc)) for i, b in enumerate(sim.buildings)]
+    if how == "cheapest":
+        return min(offers, key=lambda o: o[1])[0]
+    # минимум рублей за 1 bps; частное в Big — после 1e308 float(цена) уже inf
+    return min(offers, key=lambda o: o[1] / sim.buildings[o[0]].bps)[0]
+
+
+def _manual_buys(sim, strat):
+    st = sim.state
+    if not st["auto_click"] and st["salary"] >= simulation.AUTO_CLICK_COST:
+        sim.buy_auto()
+
+    if strat["kpi"]:
+        while (st["kpi"] < strat.get("kpi_cap", 10 ** 9)
+               and st["salary"] >= simulation.KPI_UP_COST * strat.get("kpi_reserve", 1.0)):
+            sim.buy_kpi()
+
+    # копим на выбранное здание, а не скупаем всё подряд дешёвое
+    for _ in range(50):
+        idx = _pick_building(sim, strat["buy"])
+        if not _affordable(sim, idx):
+            break
+        sim.buy_building(idx, 1)
+
+
+def bot_decide(sim, strat):
+    """Одно решение бота: авто, KPI, здания, престиж, мета-магазин."""
+    st = sim.state
+    if strat["buy"] != "auto":  # иначе авто, KPI и здания покупает AutoBuyer
+        _manual_buys(sim, strat)
+
+    if st["salary"] >= simulation.PRESTIGE_MIN_SALARY * strat["prestige_at"]:
+        gained = sim.prestige()
+        for key in strat["meta"]:
+            item = next(it for it in simulation.META_ITEMS if it["key"] == key)
+            while st["prestige"] >= sim.meta_cost(key, item["base_cost"]):
+                sim.buy_meta(key)
+        return gained
+    return 0
+
+
+# -------------------------
+# OVERRIDES
+# -------------------------
+def parse_override(text):
+    """"NAME=value" (константа simulation) или "building.attr=value"."""
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"expected NAME=value, got {text!r}")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass  # строка как есть
+    name = name.strip()
+    if "." in name:
+        bid, attr = name.split(".", 1)
+        if not any(b.id == bid for b in simulation.make_buildings()):
+            raise argparse.ArgumentTypeError(f"unknown building {bid!r}")
+    elif not hasattr(simulation, name):
+        raise argparse.ArgumentTypeError(f"unknown constant {name!r}")
+    return name, value
+
+
+def apply_overrides(overrides, sim=None):
+    """Константы — до создания sim (sim=None), поля зданий — в уже созданную."""
+    for name, value in overrides:
+        if "." not in name:
+            if sim is None:
+                setattr(simulation, name, value)
+        elif sim is not None:
+            bid, attr = name.split(".", 1)
+            for b in sim.buildings:
+                if b.id == bid:
+                    setattr(b, attr, value)
+    if sim is not None:
+        sim.invalidate_income()
+
+
+# -------------------------
+# PLAYTHROUGH
+# -------------------------
+def play(task):
+    """Одно прохождение: (стратегия, сид, длительность, dt, подмены) -> метрики."""
+    name, seed, duration, dt, overrides = task
+    strat = STRATEGIES[name]
+    apply_overrides(overrides)
+    sim = GameSimulation(now=0.0, seed=seed)
+    apply_overrides(overrides, sim)
+    if strat["buy"] == "auto":
+        sim.set_autobuy(True)
+
+    rank_times = {RANKS[0].name: 0.0}
+    prestige_times = []
+    bosses = 0
+    curve = []
+    click_budget = 0.0
+    next_decide = 0.0
+    next_sample = 0.0
+    boss_was = False
+    t = 0.0
+    while t < duration:
+        if t >= next_sample:
+            curve.append(float(sim.state["earned_salary"]))
+            next_sample += SAMPLE_EVERY
+        if t >= next_decide:
+            if bot_decide(sim, strat):
+                prestige_times.append(round(t, 2))
+            next_decide += DECIDE_EVERY
+
+        if strat["cps"] and (not strat["taisher"] or sim.is_taisher_now() or sim.boss_active):
+            click_budget += strat["cps"] * dt
+            while click_budget >= 1.0:
+                sim.click()
+                click_budget -= 1.0
+
+        sim.step(dt)
+        t += dt
+        if sim.boss_active and not boss_was:
+            bosses += 1
+        boss_was = sim.boss_active
+        rank_times.setdefault(sim.rank.name, round(t, 2))
+
+    st = sim.state
+    # проверка, идущая в момент конца прогона, не считается
+    finished = bosses - (1 if sim.boss_active else 0)
+    return {
+        "strategy": name,
+        "seed": seed,
+        "rank_times": rank_times,
+        "prestige_times": prestige_times,
+        "bosses": finished,
+        "boss_wins": st["boss_wins"],
+        "curve": curve,
+        "final": {
+            "kpi": st["kpi"],
+            "prestige": st["prestige"],
+            "clicks": st["clicks"],
+            "buildings": [b.count for b in sim.buildings],
+            "earned_log10": round(st["earned_salary"].log10(), 4) if st["earned_salary"] > 0 else None,
+        },
+    }
+
+
+# -------------------------
+# AGGREGATE
+# -------------------------
+def dist(values, runs):
+    """Перцентили по прогонам, где событие случилось; reached — их доля."""
+    out = {"reached": round(len(values) / runs, 4) if runs else 0.0}
+    if values:
+        out["mean"] = round(sum(values) / len(values), 3)
+        for q in PCTS:
+            out[f"p{q}"] = round(percentile(values, q), 3)
+    return out
+
+
+def aggregate(results):
+    by_strat = {}
+    for r in results:
+        by_strat.setdefault(r["strategy"], []).append(r)
+
+    out = {}
+    for name, runs in by_strat.items():
+        n = len(runs)
+        ranks = {rk.name: dist([r["rank_times"][rk.name] for r in runs if rk.name in r["rank_times"]], n)
+                 for rk in RANKS}
+        prestige = dist([r["prestige_times"][0] for r in runs if r["prestige_times"]], n)
+        rates = [r["boss_wins"] / r["bosses"] for r in runs if r["bosses"]]
+        points = min(len(r["curve"]) for r in runs)
+        curve = []
+        for k in range(points):
+            vals = [r["curve"][k] for r in runs]
+            row = {"t": k * SAMPLE_EVERY}
+            row.update({f"p{q}": round(percentile(vals, q), 2) for q in PCTS})
+            curve.append(row)
+        out[name] = {
+            "runs": n,
+            "time_to_rank": ranks,
+            "time_to_prestige": prestige,
+            "prestiges_per_run": dist([len(r["prestige_times"]) for r in runs], n),
+            "boss_win_rate": dist(rates, n),
+            "bosses_per_run": round(sum(r["bosses"] for r in runs) / n, 3),
+            "final_kpi": dist([r["final"]["kpi"] for r in runs], n),
+            "earned_salary": curve,
+        }
+    return out
+
+
+def write_csv(path, agg):
+    # длинный формат: одна строка — одна метрика одной стратегии
+    cols = ["reached", "mean"] + [f"p{q}" for q in PCTS]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["strategy", "metric", "key"] + cols)
+
+        def row(name, metric, key, d):
+            w.writerow([name, metric, key] + [d.get(c, "") for c in cols])
+
+        for name, a in agg.items():
+            for rank, d in a["time_to_rank"].items():
+                row(name, "time_to_rank", rank, d)
+            row(name, "time_to_prestige", "first", a["time_to_prestige"])
+            row(name, "prestiges_per_run", "", a["prestiges_per_run"])
+            row(name, "boss_win_rate", "", a["boss_win_rate"])
+            row(name, "final_kpi", "", a["final_kpi"])
+            for pt in a["earned_salary"]:
+                row(name, "earned_salary", int(pt["t"]), pt)
+
+
+def print_report(agg):
+    for name, a in agg.items():
+        pr = a["time_to_prestige"]
+        br = a["boss_win_rate"]
+        print(f"\n== {name} ({a['runs']} runs, {a['bosses_per_run']} bosses/run)")
+        if "p50" in pr:
+            print(f"  first prestige  p10 {fmt_t(pr['p10'])}  p50 {fmt_t(pr['p50'])}  "
+                  f"p90 {fmt_t(pr['p90'])}  reached {pr['reached']:.0%}")
+        else:
+            print("  first prestige  never")
+        if "p50" in br:
+            print(f"  boss win rate   p10 {br['p10']:.0%}  p50 {br['p50']:.0%}  p90 {br['p90']:.0%}")
+        for rank, d in a["time_to_rank"].items():
+            if "p50" in d and d["p50"] > 0:
+                print(f"  {rank:<22} p50 {fmt_t(d['p50']):>8}  p90 {fmt_t(d['p90']):>8}  reached {d['reached']:.0%}")
+
+
+def fmt_t(sec):
+    return simulation.fmt_duration(sec) if sec >= 1 else f"{sec:.1f}s"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monte Carlo balance simulator (headless playthroughs)")
+    ap.add_argument("-b", "--bot", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    ap.add_argument("-n", "--runs", type=int, default=200, help="playthroughs per bot")
+    ap.add_argument("-t", "--duration", type=float, default=3600.0, help="seconds of game time per run")
+    ap.add_argument("--dt", type=float, default=0.25, help="simulation tick, sec")
+    ap.add_argument("--seed", type=int, default=1, help="first seed; run k uses seed + k")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--set", dest="overrides", action="append", default=[], type=parse_override,
+                    metavar="NAME=VALUE", help="override a simulation constant or building.attr")
+    ap.add_argument("-o", "--out", default="balance.json")
+    ap.add_argument("--csv", metavar="FILE.csv")
+    ap.add_argument("--raw", action="store_true", help="keep per-run results in the JSON")
+    args = ap.parse_args(argv)
+
+    tasks = [(name, args.seed + k, args.duration, args.dt, args.overrides)
+             for name in args.bot for k in range(args.runs)]
+    t0 = time.perf_counter()
+    if args.jobs > 1:
+        with Pool(args.jobs) as pool:
+            # прогоны разной длины — мелкие пачки, чтобы ядра не простаивали
+            chunk = max(1, len(tasks) // (args.jobs * 8))
+            results = list(pool.imap_unordered(play, tasks, chunksize=chunk))
+    else:
+        results = [play(t) for t in tasks]
+    results.sort(key=lambda r: (r["strategy"], r["seed"]))
+    elapsed = time.perf_counter() - t0
+
+    agg = aggregate(results)
+    print_report(agg)
+    print(f"\n{len(tasks)} runs x {fmt_t(args.duration)} in {elapsed:.1f}s on {args.jobs} processes")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "runs": args.runs,
+            "duration": args.duration,
+            "dt": args.dt,
+            "seed": args.seed,
+            "overrides": dict(args.overrides),
+            "strategies": {name: STRATEGIES[name] for name in args.bot},
+            "elapsed": round(elapsed, 2),
+        },
+        "strategies": agg,
+    }
+    if args.raw:
+        report["runs"] = results
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"saved {os.path.abspath(args.out)}")
+    if args.csv:
+        write_csv(args.csv, agg)
+        print(f"saved {os.path.abspath(args.csv)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: БЕНЧМАРК
+# ===============================
+# Гоняет настоящий кадр main.run_frame() без окна и звука (SDL dummy)
+# по сценариям и пишет время секций (economy / events / achievements /
+# input / update / render / flip) в JSON — его можно сравнить с
+# прошлым прогоном и поймать регрессию.
+#
+#   python bench.py                       # все сценарии, таблица + bench.json
+#   python bench.py -s late meta_shop -n 300 --dirty
+#   python bench.py --compare old.json    # код возврата 1 при регрессии
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FRAME_DT = 1.0 / 60
+CLICK_EVERY = 10  # кадров между синтетическими кликами по «ПИКАЙ»
+
+
+# -------------------------
+# SCENARIOS
+# -------------------------
+def setup_fresh(game, sim):
+    pass
+
+
+def setup_late(game, sim):
+    from bignum import Big
+    st = sim.state
+    for b, n in zip(sim.buildings, (400, 300, 200, 120)):
+        b.count = n
+    st["kpi"] = 420
+    st["upgrade_goal"] = Big.pow(1.22, 419) * 100
+    st["salary"] = Big.pow(10, 45)
+    st["prestige"] = 60
+    st["meta"].update({"income": 5, "cheap": 4, "taisher": 2, "events": 2})
+    sim.sync_rank()
+    sim.recalc_prestige_mult()
+    sim.buy_auto()
+
+
+def setup_levelup(game, sim):
+    # 70 — исходный размер вспышки, чтобы замеры сравнивались со старыми
+    sim.on_rank_up = lambda rank: game.spawn_levelup_particles(n=70)
+
+
+def setup_levelup_400(game, sim):
+    # вспышка по умолчанию в игре (после перехода на массивы частиц)
+    sim.on_rank_up = lambda rank: game.spawn_levelup_particles(n=400)
+
+
+def frame_levelup(game, sim, i):
+    # полноценное повышение раз в 2 сек: вспышка, оверлей, частицы, смена фона
+    if i % 120 == 0:
+        from simulation import RANKS
+        sim.state["kpi"] = RANKS[(i // 120 + 1) % len(RANKS)].min_kpi
+
+
+def setup_meta_shop(game, sim):
+    game.meta_open = True
+
+
+def frame_meta_shop(game, sim, i):
+    # стопка тостов и уведомлений всё время полная
+    while len(sim.state["toasts"]) < 8:
+        sim.toast(f"Тост #{i}: длинный текст про склад", 3.0)
+    while len(sim.state["notifications"]) < 6:
+        sim.notify(f"Уведомление #{i}", (255, 215, 0))
+
+
+SCENARIOS = {
+    # имя: (setup, per-frame hook)
+    "fresh": (setup_fresh, None),
+    "late": (setup_late, None),
+    "levelup": (setup_levelup, frame_levelup),
+    "levelup_400": (setup_levelup_400, frame_levelup),
+    "meta_shop": (setup_meta_shop, frame_meta_shop),
+}
+
+
+# -------------------------
+# RUN
+# -------------------------
+def run_scenario(game, name, frames, warmup, seed):
+    import pygame
+    from simulation import GameSimulation
+
+    setup, per_frame = SCENARIOS[name]
+    sim = GameSimulation(now=1_000_000.0, seed=seed)
+    game.use_sim(sim)
+    game.meta_open = False
+    game.particles.clear()
+    game.particles.reseed(seed)
+    game.dirty.invalidate()
+    setup(game, sim)
+    game.update_building_btn_labels()
+
+    click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=game.btn_click.base_rect.center, button=1)
+    tc = game.text_cache
+    for i in range(warmup + frames):
+        if i == warmup:
+            game.prof.reset()
+            allocs0, hits0, misses0 = game.surface_pool.allocs, tc.hits, tc.misses
+        if per_frame:
+            per_frame(game, sim, i)
+        if i % CLICK_EVERY == 0:
+            pygame.event.post(click)
+        game.run_frame(FRAME_DT)
+
+    return {
+        "frames": frames,
+        "phases": game.prof.summary(),
+        "particles_end": game.particles.count,
+        "surface_allocs": game.surface_pool.allocs - allocs0,
+        "text_cache": {"hits": tc.hits - hits0, "misses": tc.misses - misses0},
+    }
+
+
+def load_game(dirty):
+    # сейв пишется/читается в cwd — уводим его во временную папку,
+    # ассеты main.py ищет рядом с собой
+    os.chdir(tempfile.mkdtemp(prefix="psi-bench-"))
+    sys.argv = ["main.py"] + (["--dirty"] if dirty else [])
+    sys.path.insert(0, HERE)
+    import main as game
+    return game
+
+
+def compare(results, baseline, threshold, min_ms=0.05):
+    """Список регрессий: средняя секция медленнее базы больше чем на threshold."""
+    bad = []
+    for name, res in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for phase, st in res["phases"].items():
+            old = base["phases"].get(phase)
+            if not old:
+                continue
+            delta = st["mean"] - old["mean"]
+            ratio = delta / old["mean"] if old["mean"] else 0.0
+            line = f"{name:>10} {phase:>12}  {old['mean']:8.3f} -> {st['mean']:8.3f} ms  ({ratio:+.0%})"
+            print(line)
+            if ratio > threshold and delta > min_ms:
+                bad.append(line)
+    return bad
+
+
+def print_table(results):
+    for name, res in results["scenarios"].items():
+        print(f"\n== {name} ({res['frames']} frames, surface allocs {res['surface_allocs']})")
+        print(f"{'section':>14} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  ms")
+        for phase, st in res["phases"].items():
+            print(f"{phase:>14} {st['mean']:8.3f} {st['p50']:8.3f} {st['p95']:8.3f} {st['p99']:8.3f} {st['max']:8.3f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless benchmark of the frame loop and economy")
+    ap.add_argument("-s", "--scenario", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    ap.add_argument("-n", "--frames", type=int, default=600)
+    ap.add_argument("--warmup", type=int, default=60)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--dirty", action="store_true", help="render with dirty rects (main.py --dirty)")
+    ap.add_argument("-o", "--out", default="bench.json")
+    ap.add_argument("--compare", metavar="BASELINE.json")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%")
+    args = ap.parse_args(argv)
+
+    out_path = os.path.abspath(args.out)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    game = load_game(args.dirty)
+    import pygame
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "dirty": args.dirty,
+            "frames": args.frames,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    for name in args.scenario:
+        results["scenarios"][name] = run_scenario(game, name, args.frames, args.warmup, args.seed)
+
+    print_table(results)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nsaved {out_path}")
+
+    if baseline is not None:
+        print()
+        bad = compare(results, baseline, args.threshold)
+        if bad:
+            print(f"\nREGRESSION ({len(bad)}):")
+            for line in bad:
+                print("  " + line)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
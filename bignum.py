@@ -0,0 +1,214 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: БОЛЬШИЕ ЧИСЛА
+# ===============================
+# Big = m * 2**e: мантисса — обычный float (0.5 <= |m| < 1, как у
+# math.frexp), порядок — int без ограничений. Пока значения влезают
+# во float, результаты сложения/умножения бит в бит совпадают с
+# float: масштабирование на степень двойки точное. Дальше 1e308
+# экономика просто продолжается — без inf и без медленных длинных int.
+# Сверка с float — tests/test_bignum.py.
+
+import math
+
+LOG10_2 = math.log10(2)
+
+# короткая шкала: K=1e3, M=1e6, ... дальше — научная запись
+SUFFIXES = ["", "K", "M", "B", "T", "Qa", "Qi", "Sx", "Sp", "Oc", "No", "Dc"]
+COMPACT_FROM = 1e6  # меньше — пишем целиком с пробелами
+_INT_LIMIT = 2 ** 1000  # int длиннее в float не влезет — раскладываем сами
+
+
+class Big:
+    __slots__ = ("m", "e")
+
+    def __init__(self, value=0.0):
+        b = Big.of(value)
+        self.m = b.m
+        self.e = b.e
+
+    @staticmethod
+    def _make(m, e):
+        # m — любой float, нормализуем через frexp
+        b = object.__new__(Big)
+        if m == 0.0 or math.isinf(m) or math.isnan(m):
+            b.m, b.e = m, 0
+        else:
+            b.m, k = math.frexp(m)
+            b.e = e + k
+        return b
+
+    @staticmethod
+    def of(x):
+        """Big из Big/int/float/строки/[m, e] (формат сейва)."""
+        if isinstance(x, Big):
+            return x
+        if isinstance(x, int) and not isinstance(x, bool) and abs(x) >= _INT_LIMIT:
+            shift = x.bit_length() - 60
+            return Big._make(float(x >> shift), shift)
+        if isinstance(x, (list, tuple)):
+            return Big._make(float(x[0]), int(x[1]))
+        return Big._make(float(x), 0)
+
+    @staticmethod
+    def pow(base, n):
+        """base ** n (base > 0) без переполнения."""
+        try:
+            return Big._make(base ** n, 0)
+        except OverflowError:
+            l2 = n * math.log2(base)
+            e = math.floor(l2)
+            return Big._make(2.0 ** (l2 - e), e)
+
+    @staticmethod
+    def from_log10(x):
+        l2 = x / LOG10_2
+        e = math.floor(l2)
+        return Big._make(2.0 ** (l2 - e), e)
+
+    # -------------------------
+    # ARITHMETIC
+    # -------------------------
+    def __add__(self, other):
+        # горячий путь (+= float каждый тик) — без промежуточного Big
+        if type(other) is float or type(other) is int and -_INT_LIMIT < other < _INT_LIMIT:
+            om, oe = math.frexp(other)
+        else:
+            o = other if isinstance(other, Big) else Big.of(other)
+            om, oe = o.m, o.e
+        if om == 0.0:
+            return self
+        if self.m == 0.0:
+            return Big._make(om, oe)
+        d = oe - self.e
+        # меньшее слагаемое ниже половины ulp большего — как во float
+        if d > 55:
+            return Big._make(om, oe)
+        if d < -55:
+            return self
+        if d >= 0:
+            return Big._make(math.ldexp(self.m, -d) + om, oe)
+        return Big._make(self.m + math.ldexp(om, d), self.e)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        b = object.__new__(Big)
+        b.m, b.e = -self.m, self.e
+        return b
+
+    def __abs__(self):
+        return -self if self.m < 0 else self
+
+    def __sub__(self, other):
+        o = other if isinstance(other, Big) else Big.of(other)
+        return self + (-o)
+
+    def __rsub__(self, other):
+        return Big.of(other) + (-self)
+
+    def __mul__(self, other):
+        o = other if isinstance(other, Big) else Big.of(other)
+        return Big._make(self.m * o.m, self.e + o.e)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        o = other if isinstance(other, Big) else Big.of(other)
+        if o.m == 0.0:
+            raise ZeroDivisionError("Big division by zero")
+        return Big._make(self.m / o.m, self.e - o.e)
+
+    def __rtruediv__(self, other):
+        return Big.of(other) / self
+
+    def sqrt(self):
+        m, e = self.m, self.e
+        if e % 2:
+            m, e = m * 2.0, e - 1
+        return Big._make(math.sqrt(m), e // 2)
+
+    def floor(self):
+        # дальше 2**53 дробной части у float уже нет
+        if self.e > 53:
+            return self
+        return Big._make(float(math.floor(math.ldexp(self.m, self.e))), 0)
+
+    def log10(self):
+        return math.log10(abs(self.m)) + self.e * LOG10_2
+
+    # -------------------------
+    # COMPARISON
+    # -------------------------
+    def _cmp(self, other):
+        o = other if isinstance(other, Big) else Big.of(other)
+        a, b = self.m, o.m
+        # разные знаки или ноль — решает мантисса, иначе порядок
+        if a == 0.0 or b == 0.0 or (a > 0) != (b > 0) or self.e == o.e:
+            return (a > b) - (a < b)
+        r = 1 if self.e > o.e else -1
+        return r if a > 0 else -r
+
+    def __eq__(self, other):
+        if not isinstance(other, (Big, int, float)):
+            return NotImplemented
+        return self._cmp(other) == 0
+
+    def __lt__(self, other):
+        return self._cmp(other) < 0
+
+    def __le__(self, other):
+        return self._cmp(other) <= 0
+
+    def __gt__(self, other):
+        return self._cmp(other) > 0
+
+    def __ge__(self, other):
+        return self._cmp(other) >= 0
+
+    __hash__ = None
+
+    def __bool__(self):
+        return self.m != 0.0
+
+    # -------------------------
+    # CONVERSION
+    # -------------------------
+    def __float__(self):
+        try:
+            return math.ldexp(self.m, self.e)
+        except OverflowError:
+            return math.copysign(math.inf, self.m)
+
+    def __int__(self):
+        if self.e <= 1000:
+            return int(math.ldexp(self.m, self.e))
+        return int(math.ldexp(self.m, 60)) << (self.e - 60)
+
+    def to_json(self):
+        """float, если влезает (старые сейвы так и читаются), иначе [m, e]."""
+        f = float(self)
+        return f if math.isfinite(f) else [self.m, self.e]
+
+    def __repr__(self):
+        return f"Big({self.m!r}, {self.e})"
+
+    def __str__(self):
+        return fmt_big(self)
+
+
+def fmt_big(x):
+    """1 234 567 до COMPACT_FROM, дальше 12.35M / 1.50Dc / 3.21e45."""
+    b = Big.of(x)
+    if abs(b) < COMPACT_FROM:
+        return f"{int(b):,}".replace(",", " ")
+    sign = "-" if b.m < 0 else ""
+    lg = b.log10()
+    exp = int(math.floor(lg))
+    mant = 10.0 ** (lg - exp)
+    if mant >= 9.995:  # 9.999e8 -> 1.00B, а не 10.00e8
+        mant, exp = 1.0, exp + 1
+    group = exp // 3
+    if group < len(SUFFIXES):
+        return f"{sign}{mant * 10 ** (exp - 3 * group):.2f}{SUFFIXES[group]}"
+    return f"{sign}{mant:.2f}e{exp}"
+
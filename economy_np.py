@@ -0,0 +1,201 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ЭКОНОМИКА ПАЧКАМИ (NumPy)
+# ===============================
+# Те же формулы, что в simulation.py (цены зданий, скидка, престиж,
+# мета-магазин, цели KPI, доход), но над массивами: таблица цен и
+# дохода по миллионам состояний считается за один проход, без
+# питоновских циклов. Для сеток баланса — в игре не используется.
+#
+# Считаем во float64, в том же порядке операций, что и скалярный код,
+# поэтому результат совпадает бит в бит, пока числа меньше ~1e308
+# (дальше скалярный код уходит в Big, а здесь будет inf). Степени
+# берём из таблицы питоновских base ** k: np.power округляет иначе,
+# чем libm, и расходится со скалярным кодом в последнем бите.
+# Сверка со скалярной версией — tests/test_economy_np.py.
+#
+#   python economy_np.py              # замер таблицы
+#   python economy_np.py --grid 1000
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from simulation import (
+    make_buildings, RANKS, RANK_THRESHOLDS,
+    PRICE_GROWTH, KPI_GOAL_START, KPI_GOAL_GROWTH, META_COST_GROWTH,
+)
+
+_B = make_buildings()
+BUILDING_IDS = [b.id for b in _B]
+BASE_PRICE = np.array([b.base_price for b in _B], dtype=np.float64)
+BPS = np.array([b.bps for b in _B], dtype=np.float64)
+RANK_MIN = np.array(RANK_THRESHOLDS)
+RANK_MULTS = np.array([r.mult for r in RANKS])
+
+
+# -------------------------
+# POWERS
+# -------------------------
+_POW = {}  # base -> np.array [base ** 0, base ** 1, ...]
+
+
+def ipow(base, k):
+    """base ** k для целых k >= 0 (массивом), бит в бит как питоновский float."""
+    k = np.asarray(k, dtype=np.int64)
+    table = _POW.get(base)
+    need = int(k.max(initial=0)) + 1
+    if table is None or len(table) < need:
+        size = max(need, 2 * len(table) if table is not None else 1024)
+        vals = []
+        for i in range(size):
+            try:
+                vals.append(base ** i)
+            except OverflowError:
+                vals.append(float("inf"))
+        table = _POW[base] = np.array(vals)
+    return table[np.maximum(k, 0)]
+
+
+# -------------------------
+# BUILDINGS
+# -------------------------
+def _first(base_price, count, disc):
+    return ipow(PRICE_GROWTH, count) * base_price * disc
+
+
+def price(base_price, count, disc=1.0):
+    """Building.price(): цена следующего здания при count уже купленных."""
+    return np.floor(_first(base_price, count, disc))
+
+
+def bulk_price(base_price, count, n, disc=1.0):
+    """Building.bulk_price(): n штук подряд; n <= 0 -> 0, n == 1 -> price()."""
+    n = np.asarray(n)
+    first = _first(base_price, count, disc)
+    with np.errstate(over="ignore"):
+        total = np.floor(first * (ipow(PRICE_GROWTH, n) - 1) / (PRICE_GROWTH - 1))
+    total = np.where(n == 1, np.floor(first), total)
+    return np.where(n <= 0, 0.0, total)
+
+
+def max_affordable(money, base_price, count, disc=1.0):
+    """Building.max_affordable(): сколько штук по карману (0, если ни одной)."""
+    money, base_price, count, disc = np.broadcast_arrays(
+        np.asarray(money, dtype=np.float64), base_price, count, disc)
+    first = _first(base_price, count, disc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.floor(np.log10(money * (PRICE_GROWTH - 1) / first + 1) / np.log10(PRICE_GROWTH))
+    n = np.nan_to_num(n).astype(np.int64)
+    # та же поправка на округление, что в скалярной версии: пара шагов
+    while True:
+        down = (n > 1) & (bulk_price(base_price, count, n, disc) > money)
+        if not down.any():
+            break
+        n -= down
+    while True:
+        up = bulk_price(base_price, count, n + 1, disc) <= money
+        if not up.any():
+            break
+        n += up
+    n = np.maximum(1, n)
+    return np.where(money < np.floor(first), 0, n)
+
+
+# -------------------------
+# MULTIPLIERS
+# -------------------------
+def discount_mult(cheap_lvl):
+    return np.maximum(0.2, 1.0 - 0.10 * np.asarray(cheap_lvl))
+
+
+def prestige_mult(prestige, meta_income):
+    return 1.0 + 0.05 * np.asarray(prestige) + 0.10 * np.asarray(meta_income)
+
+
+def meta_cost(base, lvl):
+    return np.floor(base * ipow(META_COST_GROWTH, lvl)).astype(np.int64)
+
+
+def rank_mult(kpi):
+    """Множитель звания по KPI — searchsorted, как bisect в rank_for_kpi."""
+    i = np.searchsorted(RANK_MIN, kpi, side="right") - 1
+    return RANK_MULTS[np.maximum(0, i)]
+
+
+# -------------------------
+# KPI CURVE
+# -------------------------
+def kpi_goals(max_kpi):
+    """goals[k] — пиков от KPI k до k+1 (goals[0] не используется).
+
+    Цели округляются на каждом шаге, поэтому кривую строим по порядку
+    один раз; дальше это обычная таблица для индексации массивами KPI.
+    """
+    goals = np.zeros(max_kpi + 1)
+    g = float(KPI_GOAL_START)
+    for k in range(1, max_kpi + 1):
+        goals[k] = g
+        g = float(np.floor(g * KPI_GOAL_GROWTH))
+    return goals
+
+
+def boxes_to_kpi(max_kpi):
+    """cum[k] — всего пиков от KPI 1 до KPI k."""
+    cum = np.zeros(max_kpi + 1)
+    cum[2:] = np.cumsum(kpi_goals(max_kpi)[1:max_kpi])
+    return cum
+
+
+# -------------------------
+# INCOME
+# -------------------------
+def base_bps(counts):
+    """Сумма bps * count по зданиям; counts — (..., число зданий)."""
+    counts = np.asarray(counts)
+    acc = 0.0
+    for j in range(counts.shape[-1]):
+        acc = acc + BPS[j] * counts[..., j]  # порядок сложения как в sum() по зданиям
+    return acc
+
+
+def income_table(counts, prestige=0, meta_income=0, kpi=1, ach_mult=1.0, event_mult=1.0):
+    """income_breakdown() пачкой: все аргументы транслируются друг с другом."""
+    b = {
+        "prestige": prestige_mult(prestige, meta_income),
+        "event": np.asarray(event_mult, dtype=np.float64),
+        "achievements": np.asarray(ach_mult, dtype=np.float64),
+        "rank": rank_mult(kpi),
+    }
+    b["total"] = b["prestige"] * b["event"] * b["achievements"] * b["rank"]
+    b["base_bps"] = base_bps(counts)
+    b["bps"] = b["base_bps"] * b["total"]
+    return b
+
+
+def price_table(max_count=500, max_cheap=8):
+    """Цены (уровень cheap, здание, count) для count = 0..max_count."""
+    count = np.arange(max_count + 1)
+    disc = discount_mult(np.arange(max_cheap + 1))
+    return price(BASE_PRICE[None, :, None], count[None, None, :], disc[:, None, None])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Batch (NumPy) economy: table timing")
+    ap.add_argument("--grid", type=int, default=500, help="max building count in the timing grid")
+    args = ap.parse_args(argv)
+
+    # сетка: count 0..grid для двух зданий x все уровни cheap/income x престиж
+    t0 = time.perf_counter()
+    c = np.arange(args.grid + 1)
+    counts = np.stack(np.meshgrid(c, c, [0], [0], indexing="ij"), axis=-1).reshape(-1, len(_B))
+    inc = income_table(counts[:, None, :], prestige=np.arange(0, 200, 10)[None, :])
+    prices = price_table(args.grid)
+    cells = inc["bps"].size + prices.size
+    print(f"table: {cells:,} values in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
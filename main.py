@@ -1,54 +1,37 @@
 # ===============================
-# ФИОЛЕТОВАЯ СМЕНА: IDLE 3.0 
+# ФИОЛЕТОВАЯ СМЕНА: IDLE 3.0
 # ===============================
 
+import argparse
 import pygame
 import sys
-import random
 import time
-import json
-import os
 import math
-from dataclasses import dataclass
 
+from assets import AssetCache, run_in_background
+from perf import PhaseTimer, FrameProfiler, PerfLog
+from pacing import FrameScheduler, MAX_FRAME_DT
+from particles import ParticleSystem
+from replay import InputLog
+from save_io import SaveWriter
+from render_cache import TextCache, SurfacePool, DirtyTracker
+from simulation import (
+    GameSimulation, META_ITEMS, FPS, SAVE_FILE, BUY_MODES, BUY_MAX, RANKS,
+    AUTO_CLICK_COST, KPI_UP_COST, PRESTIGE_MIN_SALARY, fmt_int,
+)
 
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
 
 # -------------------------
 # CONFIG
 # -------------------------
 WIDTH, HEIGHT = 900, 600
-FPS = 60
 
-SAVE_FILE = "save.json"
 BG_IMAGE = "bg.jpg"
+# фоны званий — колонка bg в simulation.RANKS, без своего — BG_IMAGE
+BG_KEEP_RANKS = 2  # сколько соседних званий держать в памяти
 MUSIC_FILE = "bg_music.mp3"
 FONT_FILE = "Noto Sans.ttf"
 
-def load_bg(name):
-    try:
-        img = pygame.image.load(resource_path(name)).convert()
-        return pygame.transform.scale(img, (WIDTH, HEIGHT))
-    except:
-        return None
-
-bg_novice = load_bg("bg_novice.jpg")
-bg_worker = load_bg("bg_worker.jpg")
-bg_taicher = load_bg("bg_taicher.jpg")
-bg_legend = load_bg("bg_legend.jpg")
-bg_god = load_bg("bg_god.jpg")
-
-# Game constants
-CLICK_SALARY = 10
-AUTO_CLICK_COST = 5000
-KPI_UP_COST = 1000
-PRESTIGE_MIN_SALARY = 100000
-
 # UI colors
 COL_PANEL = (30, 0, 50)
 COL_PANEL_BORDER = (170, 0, 255)
@@ -63,82 +46,95 @@ COL_GOLD = (255, 215, 0)
 # -------------------------
 # INIT
 # -------------------------
-pygame.init()
-try:
-    pygame.mixer.init()
-except Exception:
-    pass
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Фиолетовая Смена: Idle 3.0")
+    # до первого кадра только дисплей и шрифты, музыка и соседние фоны — потом
+    ap.add_argument("--fast-start", action="store_true", help="show the first frame before music and backgrounds load")
+    ap.add_argument("--profile-startup", action="store_true", help="print startup phase timings")
+    # замеры кадра: F3 — оверлей; лог — раз в PERF_LOG_EVERY сек сводка в JSONL
+    ap.add_argument("--perf-hud", action="store_true", help="start with the F3 perf overlay on")
+    ap.add_argument("--perf-log", nargs="?", const="perf.jsonl", metavar="FILE",
+                    help="append frame timing summaries (default perf.jsonl)")
+    # все случайности игры от seed; лог ввода — для повтора без окна (python replay.py файл)
+    ap.add_argument("--seed", type=int, help="seed every random stream")
+    ap.add_argument("--record", nargs="?", const="session.psilog", metavar="FILE",
+                    help="record an input log for replay.py (default session.psilog)")
+    ap.add_argument("--dirty", action="store_true", help="redraw only changed regions")
+    # неизвестное (аргументы pytest, PyInstaller) пропускаем
+    return ap.parse_known_args(argv)[0]
+
+ARGS = parse_args()
+FAST_START = ARGS.fast_start
+PROFILE_STARTUP = ARGS.profile_startup
+perf_hud = ARGS.perf_hud
+PERF_LOG = ARGS.perf_log
+PERF_LOG_EVERY = 10.0
+SEED = ARGS.seed
+RECORD = ARGS.record
+startup = PhaseTimer()
+
+def init_mixer():
+    try:
+        pygame.mixer.init()
+    except Exception:
+        pass
 
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Фиолетовая Смена: Idle 3.0")
+with startup.phase("pygame.init"):
+    if FAST_START:
+        pygame.display.init()
+        pygame.font.init()
+    else:
+        pygame.init()
+if not FAST_START:
+    with startup.phase("mixer.init"):
+        init_mixer()
+
+with startup.phase("display"):
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Фиолетовая Смена: Idle 3.0")
 
-def load_bg(name):
-    try:
-        img = pygame.image.load(name).convert()
-        return pygame.transform.scale(img, (WIDTH, HEIGHT))
-    except:
-        print("Не удалось загрузить:", name)
-        return None
-
-bg_novice = load_bg("bg_novice.jpg")
-bg_worker = load_bg("bg_worker.jpg")
-bg_taicher = load_bg("bg_taicher.jpg")
-bg_legend = load_bg("bg_legend.jpg")
-bg_god = load_bg("bg_god.jpg")
 clock = pygame.time.Clock()
 
 # -------------------------
-# ASSETS (safe load)
+# ASSETS (lazy, cached)
 # -------------------------
-def safe_load_image(path: str, size=None):
-    try:
-        img = pygame.image.load(resource_path(path)).convert()
-        if size:
-            img = pygame.transform.scale(img, size)
-        return img
-    except Exception as e:
-        print(f"[WARN] Image load failed: {path} -> {e}")
-        return None
-
-def safe_load_music(path: str, volume=0.4):
-    try:
-        pygame.mixer.music.load(resource_path(path))
-        pygame.mixer.music.set_volume(volume)
-        pygame.mixer.music.play(-1)
-        return True
-    except Exception as e:
-        print(f"[WARN] Music load failed: {path} -> {e}")
-        return False
-
-def safe_font(path: str, size: int):
-    try:
-        return pygame.font.Font(resource_path(path), size)
-    except Exception:
-        return pygame.font.SysFont("arial", size)
+assets = AssetCache()
 
-bg = safe_load_image(BG_IMAGE, (WIDTH, HEIGHT))
 music_volume = 0.4
-music_ok = safe_load_music(MUSIC_FILE, music_volume)
 
-font = safe_font(FONT_FILE, 22)
-big_font = safe_font(FONT_FILE, 40)
+def start_music():
+    with startup.phase("music"):
+        assets.music(MUSIC_FILE, music_volume)
+
+def stream_music():
+    # fast-start: микшер и музыка поднимаются уже после первого кадра —
+    # в главном потоке, ввод тоже дёргает mixer.music
+    with startup.phase("mixer.init (after first frame)"):
+        init_mixer()
+    start_music()
+
+music_pending = FAST_START
+
+if not FAST_START:
+    start_music()
+
+with startup.phase("fonts"):
+    font = assets.font(FONT_FILE, 22)
+    big_font = assets.font(FONT_FILE, 40)
+
+# готовые поверхности текста (font, text, color) -> Surface
+text_cache = TextCache()
+# готовые полупрозрачные панели/оверлеи (size, rgba) -> Surface
+surface_pool = SurfacePool()
 
 # -------------------------
 # UTILS
 # -------------------------
-def fmt_int(n):
-    try:
-        n = int(n)
-    except Exception:
-        n = 0
-    return f"{n:,}".replace(",", " ")
-
 def clamp01(x: float) -> float:
     return max(0.0, min(1.0, x))
 
 def draw_panel(surface, rect, color=COL_PANEL, alpha=170, radius=14, border=COL_PANEL_BORDER, border_w=2):
-    panel = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-    panel.fill((*color, alpha))
+    panel = surface_pool.filled((rect.width, rect.height), (*color, alpha))
     surface.blit(panel, rect)
     pygame.draw.rect(surface, border, rect, border_w, border_radius=radius)
 
@@ -167,20 +163,31 @@ class AnimButton:
         # animation
         self.scale = 1.0
         self.target = 1.0
-        self.speed = 0.22
+        self.speed = 0.22  # доля пути за кадр при 60 FPS
+        self._rect = None  # rect() для _rect_scale — не пересоздаём на каждый hit()
+        self._rect_scale = None
 
     def bump(self, to=0.90):
         self.target = to
 
-    def update(self):
-        self.scale += (self.target - self.scale) * self.speed
+    def update(self, dt=1.0 / FPS):
+        # та же экспонента, что и «speed за кадр», но от реального dt
+        k = 1.0 - (1.0 - self.speed) ** (dt * FPS)
+        self.scale += (self.target - self.scale) * k
         if abs(self.scale - self.target) < 0.01:
             self.target = 1.0
 
     def rect(self):
-        w = max(1, int(self.base_rect.w * self.scale))
-        h = max(1, int(self.base_rect.h * self.scale))
-        return pygame.Rect(self.base_rect.centerx - w//2, self.base_rect.centery - h//2, w, h)
+        # общий объект: только читать, не менять на месте
+        if self.scale != self._rect_scale:
+            w = max(1, int(self.base_rect.w * self.scale))
+            h = max(1, int(self.base_rect.h * self.scale))
+            self._rect = pygame.Rect(self.base_rect.centerx - w//2, self.base_rect.centery - h//2, w, h)
+            self._rect_scale = self.scale
+        return self._rect
+
+    def is_animating(self):
+        return self.target != 1.0 or abs(self.scale - 1.0) > 0.005
 
     def is_hover(self, mouse_pos):
         return self.rect().collidepoint(mouse_pos)
@@ -198,7 +205,7 @@ class AnimButton:
         y = r.centery - total_h // 2
 
         for line in self.label_lines:
-            txt = self.font.render(str(line), True, self.text_color)
+            txt = text_cache.render(self.font, str(line), self.text_color)
             tr = txt.get_rect(center=(r.centerx, y + self.font.get_height()//2))
             surface.blit(txt, tr)
             y += self.font.get_height()
@@ -206,183 +213,36 @@ class AnimButton:
     def hit(self, pos):
         return self.rect().collidepoint(pos)
 
-# -------------------------
-# DATA MODELS
-# -------------------------
-@dataclass
-class Building:
-    id: str
-    name: str
-    base_price: int
-    bps: float
-    count: int = 0
-
-    def price(self, discount_mult: float = 1.0):
-        return int(self.base_price * (1.15 ** self.count) * discount_mult)
-
-# Rank logic
-def rank_from_kpi(kpi_val):
-    if kpi_val < 5:
-        return "Новичок"
-    elif kpi_val < 10:
-        return "Стажёр"
-    elif kpi_val < 20:
-        return "Работяга"
-    elif kpi_val < 35:
-        return "Старший смены"
-    elif kpi_val < 50:
-        return "Тащер"
-    elif kpi_val < 75:
-        return "Мастер склада"
-    elif kpi_val < 100:
-        return "Легенда смены"
-    elif kpi_val < 150:
-        return "Архитектор логистики"
-    elif kpi_val < 250:
-        return "Повелитель мезонина"
-    elif kpi_val < 400:
-        return "Инспектор хаоса"
-    else:
-        return "Фиолетовый Бог"
-
-
-# -------------------------
-# GAME STATE (single dict to keep it clean)
-# -------------------------
-state = {
-    "boxes": 0.0,
-    "salary": 0.0,
-    "kpi": 1,
-    "upgrade_goal": 100,
-
-    "auto_click": False,
-    "auto_timer": 0,
-
-    "prestige": 0,
-    "prestige_mult": 1.0,
-
-    # meta upgrades
-    "meta": {"income": 0, "cheap": 0, "taisher": 0, "events": 0},
-
-    # events
-    "event_active": False,
-    "event_text": "",
-    "event_timer": 0,
-    "event_mult": 1.0,
-    "next_event_time": time.time() + random.randint(20, 35),
-    
-    "loot_active": False,
-    "loot_timer": 0,
-    "next_loot_time": time.time() + random.randint(20, 40),
-
-    # stats
-    "clicks": 0,
-    "earned_salary": 0.0,
-    "boss_wins": 0,
-
-    # ui/feedback
-    "rank": "Новичок",
-    "prev_rank": "Новичок",
-    "flash": 0,
-    "particles": [],
-    "level_up": False,
-    "level_up_timer": 0,
-
-    "toasts": [],          # [{text,timer}]
-    "notifications": [],   # [{text,timer,y_offset,color}]
-}
-
-buildings = [
-    Building("sorter", "Сортировщик", 150, 0.3),
-    Building("buffer", "Буфер", 800, 1.5),
-    Building("mezz", "Мезонин", 4500, 6.0),
-    Building("autosort", "Автосорт", 25000, 25.0),
-]
-
-# -------------------------
-# STATE HELPERS
-# -------------------------
-def recalc_prestige_mult():
-    p = state["prestige"]
-    meta_income = state["meta"]["income"]
-    state["prestige_mult"] = 1.0 + 0.05 * p + 0.10 * meta_income
-
-def discount_mult():
-    # cheap meta: -10% each level
-    lvl = state["meta"]["cheap"]
-    return max(0.2, 1.0 - 0.10 * lvl)
-
-def total_bps():
-    return sum(b.bps * b.count for b in buildings)
-
-def add_boxes(amount: float):
-    state["boxes"] += amount
-
-def add_salary(amount: float):
-    state["salary"] += amount
-    if amount > 0:
-        state["earned_salary"] += amount
-
-def toast(text: str, timer: int = 180):
-    state["toasts"].append({"text": text, "timer": timer})
-
-def notify(text: str, color=(255,255,255)):
-    state["notifications"].append({
-        "text": text,
-        "timer": 160,
-        "y_offset": -60,
-        "color": color
-    })
+    def signature(self, mouse_pos):
+        # всё, от чего зависит картинка кнопки (для dirty rects)
+        r = self.rect()
+        return (r.size, tuple(self.label_lines), r.collidepoint(mouse_pos),
+                self.base_color, self.hover_color)
 
 # -------------------------
-# SAVE / LOAD
+# GAME (simulation owns state/buildings/achievements/boss)
 # -------------------------
-def save_game():
-    data = {
-        "boxes": state["boxes"],
-        "salary": state["salary"],
-        "kpi": state["kpi"],
-        "upgrade_goal": state["upgrade_goal"],
-        "auto_click": state["auto_click"],
-        "prestige": state["prestige"],
-        "meta": state["meta"],
-        "buildings": {b.id: b.count for b in buildings},
-    }
-    try:
-        with open(SAVE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print("[WARN] Save failed:", e)
+# секции кадра: economy/events/achievements/input/update/render/flip
+prof = FrameProfiler()
 
-def load_game():
-    if not os.path.exists(SAVE_FILE):
-        return
-    try:
-        with open(SAVE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        state["boxes"] = float(data.get("boxes", 0.0))
-        state["salary"] = float(data.get("salary", 0.0))
-        state["kpi"] = int(data.get("kpi", 1))
-        state["upgrade_goal"] = int(data.get("upgrade_goal", 100))
-        state["auto_click"] = bool(data.get("auto_click", False))
-        state["prestige"] = int(data.get("prestige", 0))
-        state["meta"].update(data.get("meta", {}))
-
-        saved_b = data.get("buildings", {})
-        for b in buildings:
-            b.count = int(saved_b.get(b.id, 0))
-
-        recalc_prestige_mult()
-        r = rank_from_kpi(state["kpi"])
-        state["rank"] = r
-        state["prev_rank"] = r
+def use_sim(new_sim):
+    """Подключить симуляцию к окну (старт игры, сценарии bench.py)."""
+    global sim, state, buildings
+    sim = new_sim
+    state = sim.state
+    buildings = sim.buildings
+    sim.on_rank_up = lambda rank: spawn_levelup_particles()
+    sim.profiler = prof
 
-    except Exception as e:
-        print("[WARN] Load failed:", e)
-
-load_game()
-recalc_prestige_mult()
+input_log = None
+with startup.phase("load save"):
+    s = GameSimulation(seed=SEED)
+    loaded = s.load(SAVE_FILE)
+    use_sim(s)
+    if RECORD:
+        # до первого тика: заголовок лога — seed, время и этот сейв
+        input_log = InputLog(RECORD)
+        input_log.start(s, save=loaded)
 
 # -------------------------
 # UI LAYOUT (buttons)
@@ -398,8 +258,8 @@ btn_click = AnimButton(
 )
 
 btn_prestige = AnimButton(pygame.Rect(650, 20, 220, 55), ["Перерождение"], radius=12, font_obj=font)
-btn_kpi = AnimButton(pygame.Rect(650, 90, 220, 55), ["KPI +1 (1000Р)"], radius=12, font_obj=font)
-btn_auto = AnimButton(pygame.Rect(650, 160, 220, 55), ["Авто (5000Р)"], radius=12, font_obj=font)
+btn_kpi = AnimButton(pygame.Rect(650, 90, 220, 55), [f"KPI +1 ({KPI_UP_COST}Р)"], radius=12, font_obj=font)
+btn_auto = AnimButton(pygame.Rect(650, 160, 220, 55), [f"Авто ({AUTO_CLICK_COST}Р)"], radius=12, font_obj=font)
 
 # right building buttons
 building_btns = []
@@ -408,76 +268,56 @@ for i, b in enumerate(buildings):
     base_rect = pygame.Rect(650, y0 + i * 70, 220, 60)
     building_btns.append(AnimButton(base_rect, [b.name], radius=14, font_obj=font))
 
+# buy mode toggle under buildings: x1 / x10 / x100 / макс
+buy_mode_idx = 0
+btn_buy_mode = AnimButton(pygame.Rect(650, 525, 220, 40), ["Покупка: x1"], radius=12, font_obj=font)
+
+def buy_mode():
+    return BUY_MODES[buy_mode_idx]
+
 # bottom left meta button (we will implement in Part 2)
 btn_meta = AnimButton(pygame.Rect(20, 520, 200, 50), ["META SHOP"], radius=12, font_obj=font)
 meta_open = False
 
-# -------------------------
-# ACHIEVEMENTS
-# -------------------------
-achievements = [
-    {"id":"first_click", "name":"Первый пик", "desc":"Сделать первый клик",
-     "cond": lambda st: st["clicks"] >= 1, "bonus": 0.02},
-    {"id":"kpi_25", "name":"KPI 25", "desc":"Достичь KPI 25",
-     "cond": lambda st: st["kpi"] >= 25, "bonus": 0.05},
-    {"id":"build_10", "name":"Бригада", "desc":"Иметь 10 зданий",
-     "cond": lambda st: st["total_buildings"] >= 10, "bonus": 0.03},
-    {"id":"prestige_1", "name":"Перерождение", "desc":"Сделать престиж 1 раз",
-     "cond": lambda st: st["prestige"] >= 1, "bonus": 0.05},
-    {"id":"boss_win", "name":"Прошёл проверку", "desc":"Выиграть босса-проверку",
-     "cond": lambda st: st["boss_wins"] >= 1, "bonus": 0.04},
-]
-unlocked = set()
-ach_mult = 1.0  # мультик достижений, пересчитываем из unlocked
-
-def recalc_ach_mult():
-    global ach_mult
-    m = 1.0
-    for a in achievements:
-        if a["id"] in unlocked:
-            m *= (1.0 + a.get("bonus", 0.0))
-    ach_mult = m
-
-recalc_ach_mult()
+all_btns = [btn_click, btn_prestige, btn_kpi, btn_auto, btn_meta, btn_buy_mode] + building_btns
 
-# -------------------------
-# META SHOP
-# -------------------------
-META_ITEMS = [
-    {"key":"income", "title":"+10% общий доход", "desc":"Умножает всё: клики/пассив/авто", "base_cost": 3},
-    {"key":"cheap",  "title":"-10% цены зданий", "desc":"Здания дешевле навсегда", "base_cost": 3},
-    {"key":"taisher","title":"+2 сек Тащер-режим", "desc":"Тащер длится дольше", "base_cost": 2},
-    {"key":"events", "title":"+25% длительность событий", "desc":"События держатся дольше", "base_cost": 2},
-]
-
-def meta_cost(key, base):
-    lvl = state["meta"].get(key, 0)
-    return int(base * (1.65 ** lvl))
+# мета-магазин: строки и кнопки BUY — одни и те же для отрисовки и кликов
+META_ROWS = [pygame.Rect(240, 110 + idx * 80, 420, 65) for idx in range(len(META_ITEMS))]
+META_BUY_RECTS = [pygame.Rect(r.right - 120, r.y + 14, 100, 36) for r in META_ROWS]
 
 # -------------------------
 # EFFECTS / PARTICLES
 # -------------------------
-def spawn_levelup_particles(n=70):
-    state["particles"].clear()
-    for _ in range(n):
-        state["particles"].append([
-            WIDTH // 2,
-            HEIGHT // 2,
-            random.uniform(-6, 6),
-            random.uniform(-6, 6),
-            random.randint(4, 8)
-        ])
-
-def draw_warehouse_evolution(surface, kpi_val):
+PARTICLE_SPEED = 360.0  # px/сек
+PARTICLE_DECAY = 7.2    # радиус/сек
+PARTICLE_CAPACITY = 4096
+CLICK_PARTICLES_MAX = 200  # искр на одну пачку кликов/покупку
+
+particles = ParticleSystem(PARTICLE_CAPACITY, decay=PARTICLE_DECAY,
+                           seed=sim.rng["cosmetic"].getrandbits(32))
+
+def spawn_levelup_particles(n=400):
+    particles.burst(WIDTH // 2, HEIGHT // 2, n, PARTICLE_SPEED)
+
+def spawn_click_particles(rect, n):
+    particles.burst(rect.centerx, rect.centery, n, PARTICLE_SPEED / 2, radius=(2, 5))
+
+def update_particles(dt):
+    particles.update(dt)
+
+def draw_particles(surface):
+    particles.draw(surface)
+
+def draw_warehouse_evolution(surface, kpi_val, t=None):
     # лёгкие «живые» квадраты на фоне
-    evo = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
     p = min(1.0, kpi_val / 60.0)
     alpha = int(35 + 85 * p)
-    evo.fill((30, 0, 60, alpha))
-    surface.blit(evo, (0, 0))
+    # альфа меняется с каждым KPI до 60 — одна поверхность, а не ключ в пуле на уровень
+    surface.blit(surface_pool.refill("warehouse", (WIDTH, HEIGHT), (30, 0, 60, alpha)), (0, 0))
 
     count = int(6 + 18 * p)
-    t = time.time()
+    if t is None:
+        t = sim.now
     for i in range(count):
         x = int((i * 47 + 120 * math.sin(t*0.35 + i)) % WIDTH)
         y = int((i * 29 +  90 * math.cos(t*0.25 + i*0.7)) % HEIGHT)
@@ -486,233 +326,409 @@ def draw_warehouse_evolution(surface, kpi_val):
         a = 18 + int(45 * p)
         pygame.draw.rect(surface, (160, 0, 220, a), (x, y, w, h), border_radius=6)
 
-# -------------------------
-# TAISHER WINDOW (with meta)
-# -------------------------
-def is_taisher_now():
-    base = 3.0
-    extra = state["meta"]["taisher"] * 2.0
-    return (time.time() % 15.0) < (base + extra)
-
-# -------------------------
-# RANDOM EVENTS
-# -------------------------
-def start_random_event(now):
-    etype = random.choice(["bonus", "debuff", "boost"])
-    state["event_active"] = True
-    state["event_mult"] = 1.0
-
-    if etype == "bonus":
-        bonus = random.randint(1000, 5000)
-        add_salary(bonus)
-        state["event_text"] = f"СРОЧНАЯ ПОСТАВКА! +{fmt_int(bonus)}Р"
-        state["event_timer"] = 180
-        notify(state["event_text"], (255, 255, 255))
-
-    elif etype == "debuff":
-        state["event_mult"] = 0.5
-        state["event_text"] = "ПРОВЕРКА! -50% дохода"
-        state["event_timer"] = 300
-        notify(state["event_text"], (255, 170, 170))
-
-    else:
-        state["event_mult"] = 3.0
-        state["event_text"] = "ГОРЯЧАЯ СМЕНА! x3 доход"
-        state["event_timer"] = 300
-        notify(state["event_text"], (255, 255, 0))
-
-    # meta: longer events
-    if state["meta"]["events"] > 0:
-        state["event_timer"] = int(state["event_timer"] * (1.0 + 0.25 * state["meta"]["events"]))
-
-    state["next_event_time"] = now + random.randint(25, 45)
-
-# -------------------------
-# BOSS CHECK
-# -------------------------
-boss_active = False
-boss_timer = 0
-boss_goal = 0
-boss_progress = 0
-total_boxes_earned = 0.0
-boss_start_earned = 0.0
-next_boss_time = time.time() + random.randint(120, 180)
-
-def add_boxes_earned(amount):
-    global total_boxes_earned
-    total_boxes_earned += amount
-    add_boxes(amount)
-
 # -------------------------
 # UI: right building button labels update helper
 # -------------------------
+labels_changes = -1  # sim.shop_changes, под который построены подписи
+
 def update_building_btn_labels():
+    global labels_changes
+    labels_changes = sim.shop_changes
+    mode = buy_mode()
     for i, b in enumerate(buildings):
-        price = b.price(discount_mult())
+        n, price = sim.bulk_offer(i, mode)
+        if mode == 1:
+            price_line = f"{fmt_int(price)}Р | +{b.bps} к/сек"
+        else:
+            price_line = f"+{n}: {fmt_int(price)}Р"
         building_btns[i].label_lines = [
             f"{b.name} x{b.count}",
-            f"{fmt_int(price)}Р | +{b.bps} к/сек"
+            price_line
         ]
+    btn_buy_mode.label_lines = ["Покупка: " + ("макс" if mode == BUY_MAX else f"x{mode}")]
 
 update_building_btn_labels()
 
 # -------------------------
 # HOTKEY HELP TEXT
 # -------------------------
+def hotkeys_text():
+    auto = "вкл" if state["autobuy"] else "выкл"
+    return f"M: музыка  |  +/-: громк. {music_volume:.1f}  |  A: автозакуп {auto}  |  F3: замеры"
+
 def draw_hotkeys(surface):
-    txt = font.render(f"M: пауза/играть  |  +/-: громк. {music_volume:.1f}", True, (220,220,220))
+    txt = text_cache.render(font, hotkeys_text(), (220,220,220))
     surface.blit(txt, (20, HEIGHT - 28))
 
+def hotkeys_rect():
+    return text_cache.render(font, hotkeys_text(), (220,220,220)).get_rect(topleft=(20, HEIGHT - 28))
+
 # -------------------------
-# MAIN LOOP
+# PERF HUD (F3)
 # -------------------------
+HUD_RECT = pygame.Rect(230, 440, 410, 118)
+HUD_REFRESH = 0.5  # сек; чаще цифры всё равно не прочитать
+HUD_WINDOW = 120   # кадров в сводке
+HUD_SECTIONS = [("economy", "эконом."), ("events", "события"), ("achievements", "достиж."),
+                ("input", "ввод"), ("update", "апдейт"), ("render", "рендер"), ("flip", "flip")]
+hud_font = assets.font(FONT_FILE, 15)
+hud_lines = ()
+hud_surfs = []
+hud_updated = 0.0
 
-running = True
-last_save_time = time.time()
+def surface_allocs():
+    # новые поверхности: панели/оверлеи, растеризация текста, спрайты частиц, картинки
+    return surface_pool.allocs + text_cache.misses + particles.allocs + assets.loads
 
-while running:
+def refresh_hud():
+    global hud_lines, hud_surfs, hud_updated
+    now = time.perf_counter()
+    if hud_surfs and now - hud_updated < HUD_REFRESH:
+        return
+    hud_updated = now
+    sec = prof.summary(HUD_WINDOW)
+    cnt = prof.counter_summary(HUD_WINDOW)
+    frame = sec.get("frame", {})
+
+    def ms(name):
+        return sec.get(name, {}).get("mean", 0.0)
+
+    def c(name):
+        return cnt.get(name, {}).get("mean", 0)
+
+    parts = [f"{label} {ms(key):.2f}" for key, label in HUD_SECTIONS]
+    hud_lines = (
+        f"FPS {prof.fps(HUD_WINDOW):.1f}   кадр p50 {frame.get('p50', 0):.1f}"
+        f"  p95 {frame.get('p95', 0):.1f}  p99 {frame.get('p99', 0):.1f} мс",
+        "  ".join(parts[:4]),
+        "  ".join(parts[4:]) + f"  всего {ms('work'):.2f} мс",
+        f"поверхностей/кадр {c('surface_allocs'):.2f}   частиц {c('particles'):.0f}",
+        f"тостов {c('toasts'):.0f}   уведомлений {c('notifications'):.0f}",
+    )
+    # HUD рисуем мимо text_cache: меняющиеся цифры вытесняли бы нужный текст
+    hud_surfs = [hud_font.render(line, True, (200, 255, 200)) for line in hud_lines]
+
+def draw_hud(surface):
+    draw_panel(surface, HUD_RECT, color=(0, 0, 0), alpha=200, radius=8, border=(0, 200, 120), border_w=1)
+    for i, txt in enumerate(hud_surfs):
+        surface.blit(txt, (HUD_RECT.x + 8, HUD_RECT.y + 6 + i * 21))
+
+# -------------------------
+# RENDER
+# -------------------------
+bg_rank = None
+
+def near_backgrounds(rank):
+    """rank — строка simulation.RANKS."""
+    i = RANKS.index(rank)
+    near = RANKS[max(0, i - BG_KEEP_RANKS):i + BG_KEEP_RANKS + 1]
+    return {BG_IMAGE} | {r.bg for r in near if r.bg}
+
+def background_for(rank):
+    global bg_rank
+    if rank is not bg_rank:
+        # фоны званий дальше BG_KEEP_RANKS от текущего выгружаем
+        bg_rank = rank
+        assets.evict_images(near_backgrounds(rank))
+    size = (WIDTH, HEIGHT)
+    img = assets.image(rank.bg, size) if rank.bg else None
+    return img or assets.image(BG_IMAGE, size)
+
+def draw_background(surface, t=None):
+    img = background_for(sim.rank)
+    if img:
+        surface.blit(img, (0, 0))
+    else:
+        surface.fill((18, 0, 30))
 
-    dt = clock.tick(FPS) / 1000.0
-    now = time.time()
-    mouse_pos = pygame.mouse.get_pos()
-    if not state["loot_active"] and now >= state["next_loot_time"]:
-        state["loot_active"] = True
-        state["loot_timer"] = 600  # 10 сек
-
-    # autosave
-    if now - last_save_time >= 2:
-        save_game()
-        last_save_time = now
-
-    # update taisher
-    taisher_mode = is_taisher_now()
-
-    # update button animations
-    btn_click.update()
-    btn_prestige.update()
-    btn_kpi.update()
-    btn_auto.update()
-    btn_meta.update()
-    for bb in building_btns:
-        bb.update()
+    draw_warehouse_evolution(surface, state["kpi"], t)
 
-    # -------------------------
-    # PASSIVE INCOME (bps)
-    # -------------------------
-    bps = total_bps() * state["prestige_mult"] * state["event_mult"] * ach_mult
-    add_boxes_earned(bps * dt)
-    add_salary((bps * CLICK_SALARY) * dt)
+    # subtle dark overlay
+    surface.blit(surface_pool.filled((WIDTH, HEIGHT), (10, 0, 20, 110)), (0, 0))
+
+def stats_lines():
+    inc = sim.income_breakdown()
+    return [
+        (f"Звание: {state['rank']}", (255, 170, 255), (40, 42)),
+        (f"Пики: {fmt_int(state['boxes'])} / {fmt_int(state['upgrade_goal'])}", COL_TEXT, (40, 100)),
+        (f"KPI: {state['kpi']}", COL_TEXT, (40, 125)),
+        (f"Зарплата: {fmt_int(state['salary'])} Р", COL_TEXT, (40, 150)),
+        (f"К/сек: {sim.income_rate():.1f}  (x{sim.income_mult():.2f})", COL_TEXT, (40, 175)),
+        (f"Престиж: {state['prestige']} (x{state['prestige_mult']:.2f})", COL_TEXT, (40, 200)),
+        (f"Достиж. x{inc['achievements']:.2f}  |  звание x{inc['rank']:.2f}", COL_TEXT_DIM, (40, 225)),
+    ]
+
+def kpi_progress():
+    return float(state["boxes"] / state["upgrade_goal"])
+
+def draw_ui(surface, mouse_pos, taisher_mode):
+    # LEFT: stats panel
+    stats_panel = pygame.Rect(20, 20, 350, 250)
+    draw_panel(surface, stats_panel)
 
-    # -------------------------
-    # AUTO CLICK
-    # -------------------------
-    if state["auto_click"]:
-        state["auto_timer"] += 1
-        if state["auto_timer"] > 60:
-            add_boxes_earned(state["kpi"] * state["prestige_mult"] * state["event_mult"] * ach_mult)
-            add_salary(CLICK_SALARY * state["prestige_mult"] * state["event_mult"] * ach_mult)
-            state["auto_timer"] = 0
+    # progress bar to next KPI
+    draw_progress(surface, pygame.Rect(40, 75, 310, 16), kpi_progress())
 
-    # -------------------------
-    # RANDOM EVENT tick
-    # -------------------------
-    if (not state["event_active"]) and now >= state["next_event_time"]:
-        start_random_event(now)
+    for text, color, pos in stats_lines():
+        surface.blit(text_cache.render(font, text, color), pos)
+
+    # Taishер text (keep inside screen)
+    if taisher_mode:
+        t = text_cache.render(big_font, "ТАЩЕР СМЕНЫ!", (255, 255, 0))
+        s = text_cache.render(big_font, "ТАЩЕР СМЕНЫ!", (0, 0, 0))
+        tr = t.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 140))
+        sr = s.get_rect(center=(WIDTH // 2 + 3, HEIGHT // 2 - 137))
+        surface.blit(s, sr)
+        surface.blit(t, tr)
+
+    # BOTTOM LEFT: meta
+    btn_meta.draw(surface, mouse_pos)
+
+    # RIGHT TOP: buttons
+    btn_prestige.draw(surface, mouse_pos)
+    btn_kpi.draw(surface, mouse_pos)
+    btn_auto.draw(surface, mouse_pos)
 
+    # CENTER: click
+    btn_click.draw(surface, mouse_pos)
+
+    # RIGHT: buildings
+    for i, b in enumerate(buildings):
+        building_btns[i].draw(surface, mouse_pos)
+        # highlight border if affordable
+        if building_affordable[i]:
+            pygame.draw.rect(surface, COL_GOLD, building_btns[i].rect(), 2, border_radius=14)
+    btn_buy_mode.draw(surface, mouse_pos)
+
+    # EVENT panel
     if state["event_active"]:
-        state["event_timer"] -= 1
-        if state["event_timer"] <= 0:
-            state["event_active"] = False
-            state["event_mult"] = 1.0
+        evt = pygame.Rect(20, 285, 350, 45)
+        draw_panel(surface, evt, color=(40, 0, 70), alpha=180, radius=12)
+        surface.blit(text_cache.render(font, state["event_text"], (255,255,255)), (evt.x + 12, evt.y + 12))
 
-    # -------------------------
-    # BOSS spawn/tick
-    # -------------------------
-    if (not boss_active) and now >= next_boss_time:
-        boss_active = True
-        boss_timer = 10 * 60
-        boss_goal = int(60 + (total_bps() * 10) + state["kpi"] * 5)
-        boss_start_earned = total_boxes_earned
-        toast("НАЧАЛЬСТВО: ПРОВЕРКА! УСПЕЙ!", 220)
-
-    if boss_active:
-        boss_timer -= 1
-        boss_progress = int(total_boxes_earned - boss_start_earned)
-
-        if boss_timer <= 0:
-            boss_active = False
-            if boss_progress >= boss_goal:
-                reward = int(5000 + boss_goal * 8)
-                add_salary(reward)
-                state["boss_wins"] += 1
-                toast(f"ПРОВЕРКА ПРОЙДЕНА! +{fmt_int(reward)}Р", 240)
-                notify("Проверка пройдена!", (255, 255, 0))
-            else:
-                penalty = int(2000 + boss_goal * 3)
-                add_salary(-penalty)
-                toast(f"ПРОВАЛ! -{fmt_int(penalty)}Р", 240)
-                notify("Провал проверки!", (255, 160, 160))
-            next_boss_time = now + random.randint(120, 240)
+    # BOSS UI
+    if sim.boss_active:
+        boss_panel = pygame.Rect(20, 340, 350, 85)
+        draw_panel(surface, boss_panel, color=(50, 0, 80), alpha=190, radius=12)
+        surface.blit(text_cache.render(font, "ПРОВЕРКА НАЧАЛЬСТВА", (255,255,255)), (boss_panel.x + 12, boss_panel.y + 10))
+        time_left = sim.boss_timer
+        surface.blit(text_cache.render(font, f"Время: {time_left:0.1f} сек", (220,220,220)), (boss_panel.x + 12, boss_panel.y + 35))
+        p = sim.boss_progress / max(1, sim.boss_goal)
+        draw_progress(surface, pygame.Rect(boss_panel.x + 12, boss_panel.y + 60, 326, 14),
+                      p, fill=(255, 80, 80), back=(40,0,50), border=(255,0,120))
+        surface.blit(text_cache.render(font, f"{sim.boss_progress}/{sim.boss_goal}", (255,255,255)), (boss_panel.x + 250, boss_panel.y + 33))
 
-    # -------------------------
-    # BOX UPGRADE (kpi level)
-    # -------------------------
-    if state["boxes"] >= state["upgrade_goal"]:
-        state["boxes"] -= state["upgrade_goal"]
-        state["kpi"] += 1
-        state["upgrade_goal"] = int(state["upgrade_goal"] * 1.22)
+    # FLASH
+    if state["flash"] > 0:
+        surface.blit(surface_pool.filled((WIDTH, HEIGHT), (255, 255, 255, 90)), (0, 0))
 
-    # -------------------------
-    # RANK UPDATE + effects
-    # -------------------------
-    new_rank = rank_from_kpi(state["kpi"])
-    RANK_MULT = {
-    "Новичок": 1.0,
-    "Стажёр": 1.05,
-    "Работяга": 1.10,
-    "Старший смены": 1.15,
-    "Тащер": 1.25,
-    "Мастер склада": 1.35,
-    "Легенда смены": 1.50,
-    "Архитектор логистики": 1.75,
-    "Повелитель мезонина": 2.0,
-    "Инспектор хаоса": 2.5,
-    "Фиолетовый Бог": 3.0,
-}
-    if new_rank != state["prev_rank"]:
-        state["prev_rank"] = new_rank
-        state["rank"] = new_rank
-        state["level_up"] = True
-        state["level_up_timer"] = 120
-        state["flash"] = 18
-        spawn_levelup_particles()
-        toast(f"НОВОЕ ЗВАНИЕ: {state['rank']}", 220)
+    # PARTICLES
+    draw_particles(surface)
 
-    # -------------------------
-    # ACHIEVEMENTS CHECK
-    # -------------------------
-    ach_state = {
-        "clicks": state["clicks"],
-        "earned_salary": state["earned_salary"],
-        "total_buildings": sum(b.count for b in buildings),
-        "prestige": state["prestige"],
-        "boss_wins": state["boss_wins"],
-        "kpi": state["kpi"],
+    # LEVEL UP overlay
+    if state["level_up"]:
+        surface.blit(surface_pool.filled((WIDTH, HEIGHT), (20, 0, 40, 170)), (0, 0))
+        surface.blit(text_cache.render(big_font, "ПОВЫШЕНИЕ!", (255, 215, 0)), (285, 220))
+        surface.blit(text_cache.render(font, f"Новое звание: {state['rank']}", (255,255,255)), (300, 275))
+
+    # TOASTS (top-right, not over buttons)
+    # рисуем левее правых кнопок, чтобы не перекрывать интерфейс
+    for i, t in enumerate(state["toasts"]):
+        r = toast_rect(i)
+        draw_panel(surface, r, color=(20,0,40), alpha=180, radius=10, border=(120,0,200))
+        surface.blit(text_cache.render(font, t["text"], (255,255,255)), (r.x + 10, r.y + 6))
+
+    # NOTIFICATIONS (top center, animated, clean)
+    for i, note in enumerate(state["notifications"]):
+        rect = note_rect(i, note)
+        draw_panel(surface, rect, color=(70, 0, 130), alpha=210, radius=12, border=(255, 0, 255))
+        txt = text_cache.render(font, note["text"], note["color"])
+        surface.blit(txt, txt.get_rect(center=rect.center))
+
+    # META SHOP overlay
+    if meta_open:
+        surface.blit(surface_pool.filled((WIDTH, HEIGHT), (10, 0, 20, 190)), (0, 0))
+
+        title = text_cache.render(big_font, "META SHOP", (255, 120, 255))
+        surface.blit(title, (240, 40))
+        surface.blit(text_cache.render(font, f"Престиж: {state['prestige']}", (255,255,255)), (240, 85))
+
+        for item, rect, buy_rect in zip(META_ITEMS, META_ROWS, META_BUY_RECTS):
+            key = item["key"]
+            lvl = state["meta"].get(key, 0)
+            cost = sim.meta_cost(key, item["base_cost"])
+
+            draw_panel(surface, rect, color=(30,0,50), alpha=170, radius=12, border=(170,0,255))
+            surface.blit(text_cache.render(font, f"{item['title']}  (ур. {lvl})", (255,255,255)), (rect.x + 14, rect.y + 10))
+            surface.blit(text_cache.render(font, item["desc"], (200,200,200)), (rect.x + 14, rect.y + 36))
+
+            can = state["prestige"] >= cost
+            col = (160, 0, 255) if can else (70, 0, 100)
+            pygame.draw.rect(surface, col, buy_rect, border_radius=10)
+            surface.blit(text_cache.render(font, f"{cost}", (255,255,255)), (buy_rect.x + 12, buy_rect.y + 8))
+            surface.blit(text_cache.render(font, "BUY", (255,255,255)), (buy_rect.x + 52, buy_rect.y + 8))
+
+        surface.blit(text_cache.render(font, "Клик по META SHOP чтобы закрыть", (220,220,220)), (240, 520))
+
+    draw_hotkeys(surface)
+
+    if perf_hud:
+        draw_hud(surface)
+
+def toast_rect(i):
+    return pygame.Rect(390, 20 + i * 34, 250, 28)
+
+def note_rect(i, note):
+    w, h = 420, 44
+    return pygame.Rect(WIDTH//2 - w//2, 14 + i * 54 + note["y_offset"], w, h)
+
+# -------------------------
+# DIRTY RECTS (optional: python main.py --dirty)
+# -------------------------
+# фон (картинка + склад + затемнение) печётся в слой один раз,
+# каждый кадр перерисовываются только области, чья «подпись» изменилась
+DIRTY_RECTS = ARGS.dirty
+dirty = DirtyTracker((0, 0, WIDTH, HEIGHT))
+bg_layer = None
+bg_layer_key = None
+
+def get_bg_layer():
+    global bg_layer, bg_layer_key
+    key = (sim.rank, min(60, state["kpi"]))
+    if key != bg_layer_key:
+        if bg_layer is None:
+            bg_layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        draw_background(bg_layer, t=0.0)  # квадраты склада замораживаем
+        bg_layer_key = key
+        dirty.invalidate()
+    return bg_layer
+
+def ui_regions(mouse_pos, taisher_mode, frame_no):
+    regions = {
+        "stats": (pygame.Rect(20, 20, 350, 250),
+                  (tuple(t for t, _, _ in stats_lines()), int(kpi_progress() * 310))),
+        "hotkeys": (hotkeys_rect(), hotkeys_text()),
     }
-    changed = False
-    for a in achievements:
-        if a["id"] not in unlocked and a["cond"](ach_state):
-            unlocked.add(a["id"])
-            toast(f"Достижение: {a['name']}", 240)
-            notify(f"Достижение: {a['name']}", (255, 210, 255))
-            changed = True
-    if changed:
-        recalc_ach_mult()
+    buttons = {"meta": btn_meta, "prestige": btn_prestige, "kpi": btn_kpi, "auto": btn_auto,
+               "click": btn_click, "buy_mode": btn_buy_mode}
+    for name, btn in buttons.items():
+        regions[name] = (btn.base_rect, btn.signature(mouse_pos))
+    for i, bb in enumerate(building_btns):
+        regions[f"b{i}"] = (bb.base_rect, (bb.signature(mouse_pos), building_affordable[i]))
 
-    # -------------------------
-    # INPUT
-    # -------------------------
+    if taisher_mode:
+        regions["taisher"] = (pygame.Rect(WIDTH // 2 - 200, HEIGHT // 2 - 175, 400, 75), True)
+    if state["event_active"]:
+        regions["event"] = (pygame.Rect(20, 285, 350, 45), state["event_text"])
+    if sim.boss_active:
+        regions["boss"] = (pygame.Rect(20, 340, 350, 85),
+                           (f"{sim.boss_timer:0.1f}", sim.boss_progress, sim.boss_goal))
+    # длинный текст может вылезать за панель — учитываем и его
+    if state["toasts"]:
+        rects = []
+        for i, t in enumerate(state["toasts"]):
+            r = toast_rect(i)
+            rects.append(r.union(text_cache.render(font, t["text"], (255,255,255)).get_rect(topleft=(r.x + 10, r.y + 6))))
+        regions["toasts"] = (rects[0].unionall(rects),
+                             tuple(t["text"] for t in state["toasts"]))
+    if state["notifications"]:
+        rects = []
+        for i, note in enumerate(state["notifications"]):
+            r = note_rect(i, note)
+            rects.append(r.union(text_cache.render(font, note["text"], note["color"]).get_rect(center=r.center)))
+        regions["notes"] = (rects[0].unionall(rects),
+                            tuple((n["text"], n["y_offset"]) for n in state["notifications"]))
+    # анимации на весь экран — пока идут, перерисовываем всё
+    if state["flash"] > 0 or state["level_up"]:
+        regions["fx"] = (pygame.Rect(0, 0, WIDTH, HEIGHT), frame_no)
+    if particles.count:
+        regions["particles"] = (particles.bounds(), frame_no)
+    if meta_open:
+        regions["meta_shop"] = (pygame.Rect(0, 0, WIDTH, HEIGHT),
+                                (state["prestige"], tuple(state["meta"].values())))
+    if perf_hud:
+        regions["perf_hud"] = (HUD_RECT, hud_lines)
+    return regions
+
+def render_frame(mouse_pos, taisher_mode, frame_no):
+    if not DIRTY_RECTS:
+        with prof.section("render"):
+            draw_background(screen)
+            draw_ui(screen, mouse_pos, taisher_mode)
+        with prof.section("flip"):
+            pygame.display.flip()
+        return
+
+    with prof.section("render"):
+        layer = get_bg_layer()
+        rects = dirty.collect(ui_regions(mouse_pos, taisher_mode, frame_no))
+        for r in rects:
+            screen.set_clip(r)
+            screen.blit(layer, r, r)
+            draw_ui(screen, mouse_pos, taisher_mode)
+        screen.set_clip(None)
+    if rects:
+        with prof.section("flip"):
+            pygame.display.update(rects)
+
+# -------------------------
+# MAIN LOOP
+# -------------------------
+
+running = True
+frame_no = 0
+pacer = FrameScheduler(active_fps=FPS)
+building_affordable = [False] * len(buildings)
+
+# autosave — такая же запись планировщика, как события и босс;
+# снимок берём в кадре, а пишет его фоновый поток
+AUTOSAVE_EVERY = 2.0
+save_writer = None
+perf_log = None
+allocs_seen = 0
+
+def dump_perf_log(at):
+    perf_log.dump(rank=state["rank"], kpi=state["kpi"])
+    sim.scheduler.schedule("perf_log", sim.now + PERF_LOG_EVERY, dump_perf_log)
+
+def autosave(at):
+    save_writer.submit(sim.snapshot())
+    if input_log:
+        input_log.flush()
+    sim.scheduler.schedule("autosave", sim.now + AUTOSAVE_EVERY, autosave)
+
+def stream_assets():
+    with startup.phase("prefetch backgrounds (bg)"):
+        assets.prefetch(sorted(near_backgrounds(sim.rank)), (WIDTH, HEIGHT))
+    if PROFILE_STARTUP:
+        print(startup.report("startup/bg"))
+
+def flush_clicks(n, taisher_mode):
+    """n кликов по «ПИКАЙ» за кадр — одно начисление, один bump, одна пачка искр."""
+    if not n:
+        return
+    sim.do("click", n)
+    btn_click.bump()
+    # в режиме Тайшера клик x5 — и искр побольше
+    spawn_click_particles(btn_click.base_rect, min(CLICK_PARTICLES_MAX, n * (40 if taisher_mode else 6)))
+
+def handle_input(taisher_mode):
+    global running, music_volume, meta_open, buy_mode_idx, perf_hud
+    # клики по «ПИКАЙ» копятся и уходят пачкой перед любым другим
+    # действием (порядок сохраняется) и в конце кадра — автокликеры
+    # шлют сотни событий за кадр
+    clicks = 0
     for event in pygame.event.get():
+        if pacer.handle_event(event):
+            dirty.invalidate()
+
+        if event.type == pygame.MOUSEBUTTONDOWN and not meta_open and btn_click.hit(event.pos):
+            clicks += 1
+            continue
+        if clicks and event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
+            flush_clicks(clicks, taisher_mode)
+            clicks = 0
+
         if event.type == pygame.QUIT:
             running = False
 
@@ -744,303 +760,165 @@ while running:
                 except Exception:
                     pass
 
+            elif event.key == pygame.K_F3:
+                perf_hud = not perf_hud
+
+            elif event.key == pygame.K_a:
+                sim.do("autobuy", not state["autobuy"])
+                sim.toast("Автозакуп включён" if state["autobuy"] else "Автозакуп выключен", 2.0)
+
         elif event.type == pygame.MOUSEBUTTONDOWN:
             mx, my = event.pos
 
             # meta open/close
             if btn_meta.hit((mx, my)):
                 meta_open = not meta_open
-                toast("META SHOP" + (" открыт" if meta_open else " закрыт"), 140)
+                sim.toast("META SHOP" + (" открыт" if meta_open else " закрыт"), 2.3)
                 btn_meta.bump()
 
             # META SHOP click handling (if open)
             if meta_open:
-                shop_x, shop_y = 240, 110
-                for idx, item in enumerate(META_ITEMS):
-                    rect = pygame.Rect(shop_x, shop_y + idx * 80, 420, 65)
-                    buy_rect = pygame.Rect(rect.right - 120, rect.y + 14, 100, 36)
+                for item, buy_rect in zip(META_ITEMS, META_BUY_RECTS):
                     if buy_rect.collidepoint((mx, my)):
-                        key = item["key"]
-                        cost = meta_cost(key, item["base_cost"])
-                        if state["prestige"] >= cost:
-                            state["prestige"] -= cost
-                            state["meta"][key] = state["meta"].get(key, 0) + 1
-                            recalc_prestige_mult()
-                            toast(f"Куплено: {item['title']}", 200)
-                            notify(f"Куплено: {item['title']}", (255, 215, 0))
-                            update_building_btn_labels()
-                        else:
-                            toast("Не хватает престижа", 160)
+                        sim.do("meta", item["key"])
                 continue
 
-            # click main
-            if btn_click.hit((mx, my)):
-                mult = 5 if taisher_mode else 1
-                earned_boxes = (state["kpi"] * mult) * state["prestige_mult"] * state["event_mult"] * ach_mult
-                earned_money = (CLICK_SALARY * mult) * state["prestige_mult"] * state["event_mult"] * ach_mult
-                add_boxes_earned(earned_boxes)
-                add_salary(earned_money)
-                state["clicks"] += 1
-                btn_click.bump()
-
-                # chance penalty
-                if random.randint(1, 20) == 1:
-                    add_salary(-50)
-
             # prestige
-            elif btn_prestige.hit((mx, my)):
-                can = state["salary"] >= PRESTIGE_MIN_SALARY
-                if can:
-                    gained = max(1, int(math.sqrt(int(state["salary"]) / PRESTIGE_MIN_SALARY)))
-                    state["prestige"] += gained
-                    recalc_prestige_mult()
-
-                    notify(f"+{gained} жетонов престижа!", (255, 0, 200))
-                    toast(f"Перерождение! +{gained} престиж", 240)
-
-                    # reset progress
-                    state["boxes"] = 0.0
-                    state["salary"] = 0.0
-                    state["kpi"] = 1
-                    state["upgrade_goal"] = 100
-                    state["auto_click"] = False
-                    state["auto_timer"] = 0
-                    for b in buildings:
-                        b.count = 0
-
-                    state["rank"] = "Новичок"
-                    state["prev_rank"] = "Новичок"
-                    state["flash"] = 18
-
-                    update_building_btn_labels()
+            if btn_prestige.hit((mx, my)):
+                if sim.do("prestige"):
                     btn_prestige.bump()
 
             # KPI up
             elif btn_kpi.hit((mx, my)):
-                if state["salary"] >= KPI_UP_COST:
-                    add_salary(-KPI_UP_COST)
-                    state["kpi"] += 1
+                if sim.do("kpi"):
                     btn_kpi.bump()
 
             # Auto buy
             elif btn_auto.hit((mx, my)):
-                if state["salary"] >= AUTO_CLICK_COST:
-                    add_salary(-AUTO_CLICK_COST)
-                    state["auto_click"] = True
-                    toast("Авто включён", 160)
-                    notify("Авто включён", (255, 210, 255))
+                if sim.do("auto"):
                     btn_auto.bump()
 
+            # buy mode toggle
+            elif btn_buy_mode.hit((mx, my)):
+                buy_mode_idx = (buy_mode_idx + 1) % len(BUY_MODES)
+                update_building_btn_labels()
+                btn_buy_mode.bump()
+
             # buildings buy
             else:
-                disc = discount_mult()
                 for i, b in enumerate(buildings):
                     if building_btns[i].hit((mx, my)):
-                        price = b.price(disc)
-                        if state["salary"] >= price:
-                            add_salary(-price)
-                            b.count += 1
-                            update_building_btn_labels()
+                        n, _ = sim.bulk_offer(i, buy_mode())
+                        if sim.do("building", i, buy_mode()):
                             building_btns[i].bump()
-                            toast(f"Куплено: {b.name}", 140)
-                            notify(f"Куплено: {b.name}", (255, 215, 0))
-                        else:
-                            toast("Не хватает денег", 120)
+                            spawn_click_particles(building_btns[i].base_rect, min(CLICK_PARTICLES_MAX, 10 * n))
                         break
 
-    # -------------------------
-    # RENDER
-    # -------------------------
-    # -------------------------
-    # RENDER
-    # -------------------------
-
-    current_rank = state["rank"]
-
-    if current_rank == "Новичок" and bg_novice:
-        screen.blit(bg_novice, (0, 0))
-    elif current_rank == "Работяга" and bg_worker:
-        screen.blit(bg_worker, (0, 0))
-    elif current_rank == "Тащер" and bg_taicher:
-        screen.blit(bg_taicher, (0, 0))
-    elif current_rank == "Легенда смены" and bg_legend:
-        screen.blit(bg_legend, (0, 0))
-    elif current_rank == "Фиолетовый Бог" and bg_god:
-        screen.blit(bg_god, (0, 0))
-    elif bg:
-        screen.blit(bg, (0, 0))
-    else:
-        screen.fill((18, 0, 30))
-
-    draw_warehouse_evolution(screen, state["kpi"])
-
-    # subtle dark overlay
-    dark = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    dark.fill((10, 0, 20, 110))
-    screen.blit(dark, (0, 0))
-
-    # LEFT: stats panel
-    stats_panel = pygame.Rect(20, 20, 350, 250)
-    draw_panel(screen, stats_panel)
-
-    # progress bar to next KPI
-    prog = state["boxes"] / max(1.0, float(state["upgrade_goal"]))
-    draw_progress(screen, pygame.Rect(40, 75, 310, 16), prog)
+    flush_clicks(clicks, taisher_mode)
 
-    screen.blit(font.render(f"Звание: {state['rank']}", True, (255, 170, 255)), (40, 42))
-    screen.blit(font.render(f"Пики: {fmt_int(state['boxes'])} / {fmt_int(state['upgrade_goal'])}", True, COL_TEXT), (40, 100))
-    screen.blit(font.render(f"KPI: {state['kpi']}", True, COL_TEXT), (40, 125))
-    screen.blit(font.render(f"Зарплата: {fmt_int(state['salary'])} Р", True, COL_TEXT), (40, 150))
-    screen.blit(font.render(f"К/сек: {(total_bps() * state['prestige_mult'] * state['event_mult'] * ach_mult):.1f}", True, COL_TEXT), (40, 175))
-    screen.blit(font.render(f"Престиж: {state['prestige']} (x{state['prestige_mult']:.2f})", True, COL_TEXT), (40, 200))
-    screen.blit(font.render(f"Бонус достижений: x{ach_mult:.2f}", True, COL_TEXT_DIM), (40, 225))
-
-    # Taishер text (keep inside screen)
-    if taisher_mode:
-        t = big_font.render("ТАЩЕР СМЕНЫ!", True, (255, 255, 0))
-        s = big_font.render("ТАЩЕР СМЕНЫ!", True, (0, 0, 0))
-        tr = t.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 140))
-        sr = s.get_rect(center=(WIDTH // 2 + 3, HEIGHT // 2 - 137))
-        screen.blit(s, sr)
-        screen.blit(t, tr)
-
-    # BOTTOM LEFT: meta
-    btn_meta.draw(screen, mouse_pos)
-
-    # RIGHT TOP: buttons
-    # Prestige disabled look
-    can_p = state["salary"] >= PRESTIGE_MIN_SALARY
-    btn_prestige.base_color = (160, 0, 255) if can_p else (70, 0, 100)
-    btn_prestige.hover_color = (180, 0, 255) if can_p else (80, 0, 120)
-
-    btn_prestige.draw(screen, mouse_pos)
-    btn_kpi.draw(screen, mouse_pos)
-    btn_auto.draw(screen, mouse_pos)
-
-    # CENTER: click
-    btn_click.draw(screen, mouse_pos)
-
-    # RIGHT: buildings
-    disc = discount_mult()
-    for i, b in enumerate(buildings):
-        # highlight border if affordable
-        price = b.price(disc)
-        building_btns[i].draw(screen, mouse_pos)
-        if state["salary"] >= price:
-            pygame.draw.rect(screen, COL_GOLD, building_btns[i].rect(), 2, border_radius=14)
-
-    # EVENT panel
-    if state["event_active"]:
-        evt = pygame.Rect(20, 285, 350, 45)
-        draw_panel(screen, evt, color=(40, 0, 70), alpha=180, radius=12)
-        screen.blit(font.render(state["event_text"], True, (255,255,255)), (evt.x + 12, evt.y + 12))
-
-    # BOSS UI
-    if boss_active:
-        boss_panel = pygame.Rect(20, 340, 350, 85)
-        draw_panel(screen, boss_panel, color=(50, 0, 80), alpha=190, radius=12)
-        screen.blit(font.render("ПРОВЕРКА НАЧАЛЬСТВА", True, (255,255,255)), (boss_panel.x + 12, boss_panel.y + 10))
-        time_left = boss_timer / 60.0
-        screen.blit(font.render(f"Время: {time_left:0.1f} сек", True, (220,220,220)), (boss_panel.x + 12, boss_panel.y + 35))
-        p = boss_progress / max(1, boss_goal)
-        draw_progress(screen, pygame.Rect(boss_panel.x + 12, boss_panel.y + 60, 326, 14),
-                      p, fill=(255, 80, 80), back=(40,0,50), border=(255,0,120))
-        screen.blit(font.render(f"{boss_progress}/{boss_goal}", True, (255,255,255)), (boss_panel.x + 250, boss_panel.y + 33))
-
-    # FLASH
-    if state["flash"] > 0:
-        fl = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        fl.fill((255, 255, 255, 90))
-        screen.blit(fl, (0, 0))
-        state["flash"] -= 1
-
-    # PARTICLES
-    for p in state["particles"][:]:
-        p[0] += p[2]
-        p[1] += p[3]
-        p[4] -= 0.12
-        pygame.draw.circle(screen, (255, random.randint(120,255), 0),
-                           (int(p[0]), int(p[1])), max(1, int(p[4])))
-        if p[4] <= 0:
-            state["particles"].remove(p)
-
-    # LEVEL UP overlay
-    if state["level_up"]:
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((20, 0, 40, 170))
-        screen.blit(overlay, (0, 0))
-        screen.blit(big_font.render("ПОВЫШЕНИЕ!", True, (255, 215, 0)), (285, 220))
-        screen.blit(font.render(f"Новое звание: {state['rank']}", True, (255,255,255)), (300, 275))
-        state["level_up_timer"] -= 1
-        if state["level_up_timer"] <= 0:
-            state["level_up"] = False
-
-    # TOASTS (top-right, not over buttons)
-    # рисуем левее правых кнопок, чтобы не перекрывать интерфейс
-    toast_x = 390
-    toast_w = 250
-    for i, t in enumerate(state["toasts"][:]):
-        y = 20 + i * 34
-        r = pygame.Rect(toast_x, y, toast_w, 28)
-        draw_panel(screen, r, color=(20,0,40), alpha=180, radius=10, border=(120,0,200))
-        screen.blit(font.render(t["text"], True, (255,255,255)), (r.x + 10, r.y + 6))
-        t["timer"] -= 1
-        if t["timer"] <= 0:
-            state["toasts"].remove(t)
-
-    # NOTIFICATIONS (top center, animated, clean)
-    for i, note in enumerate(state["notifications"][:]):
-        note["timer"] -= 1
-        if note["y_offset"] < 0:
-            note["y_offset"] += 6
-
-        w, h = 420, 44
-        x = WIDTH//2 - w//2
-        y = 14 + i * 54 + note["y_offset"]
-        rect = pygame.Rect(x, y, w, h)
-
-        draw_panel(screen, rect, color=(70, 0, 130), alpha=210, radius=12, border=(255, 0, 255))
-        txt = font.render(note["text"], True, note["color"])
-        screen.blit(txt, txt.get_rect(center=rect.center))
-
-        if note["timer"] <= 0:
-            state["notifications"].remove(note)
+def run_frame(dt):
+    """Один кадр: экономика, ввод, анимации, отрисовка. Сна внутри нет."""
+    global frame_no, building_affordable, allocs_seen, music_pending
+    mouse_pos = pygame.mouse.get_pos()
 
-    # META SHOP overlay
-    if meta_open:
-        ov = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        ov.fill((10, 0, 20, 190))
-        screen.blit(ov, (0, 0))
+    with prof.section("update"):
+        # update button animations
+        for bb in all_btns:
+            bb.update(dt)
 
-        title = big_font.render("META SHOP", True, (255, 120, 255))
-        screen.blit(title, (240, 40))
-        screen.blit(font.render(f"Престиж: {state['prestige']}", True, (255,255,255)), (240, 85))
+    # -------------------------
+    # ECONOMY (income, auto, events, boss, KPI, rank, achievements)
+    # -------------------------
+    with prof.section("economy"):
+        sim.advance(dt)
+    taisher_mode = sim.is_taisher_now()
 
-        shop_x, shop_y = 240, 110
-        for idx, item in enumerate(META_ITEMS):
-            key = item["key"]
-            lvl = state["meta"].get(key, 0)
-            cost = meta_cost(key, item["base_cost"])
+    # -------------------------
+    # INPUT
+    # -------------------------
+    with prof.section("input"):
+        handle_input(taisher_mode)
 
-            rect = pygame.Rect(shop_x, shop_y + idx * 80, 420, 65)
-            draw_panel(screen, rect, color=(30,0,50), alpha=170, radius=12, border=(170,0,255))
-            screen.blit(font.render(f"{item['title']}  (ур. {lvl})", True, (255,255,255)), (rect.x + 14, rect.y + 10))
-            screen.blit(font.render(item["desc"], True, (200,200,200)), (rect.x + 14, rect.y + 36))
+    # -------------------------
+    # UPDATE (анимации, подписи, частицы)
+    # -------------------------
+    with prof.section("update"):
+        # "макс" зависит от текущей зарплаты — подписи обновляем каждый кадр;
+        # иначе — когда поменялись здания или скидка (и авто-закупкой тоже)
+        if buy_mode() == BUY_MAX or sim.shop_changes != labels_changes:
+            update_building_btn_labels()
 
-            buy_rect = pygame.Rect(rect.right - 120, rect.y + 14, 100, 36)
-            can = state["prestige"] >= cost
-            col = (160, 0, 255) if can else (70, 0, 100)
-            pygame.draw.rect(screen, col, buy_rect, border_radius=10)
-            screen.blit(font.render(f"{cost}", True, (255,255,255)), (buy_rect.x + 12, buy_rect.y + 8))
-            screen.blit(font.render("BUY", True, (255,255,255)), (buy_rect.x + 52, buy_rect.y + 8))
+        # Prestige disabled look
+        can_p = state["salary"] >= PRESTIGE_MIN_SALARY
+        btn_prestige.base_color = (160, 0, 255) if can_p else (70, 0, 100)
+        btn_prestige.hover_color = (180, 0, 255) if can_p else (80, 0, 120)
 
-        screen.blit(font.render("Клик по META SHOP чтобы закрыть", True, (220,220,220)), (240, 520))
+        mode = buy_mode()
+        building_affordable = [state["salary"] >= sim.bulk_offer(i, mode)[1] for i in range(len(buildings))]
 
-    draw_hotkeys(screen)
+        update_particles(dt)
 
-    pygame.display.flip()
+        # пока что-то анимируется — держим полный FPS
+        if (particles.count or state["flash"] > 0
+                or any(n["y_offset"] < 0 for n in state["notifications"])
+                or any(bb.is_animating() for bb in all_btns)):
+            pacer.poke()
 
-# exit
-save_game()
-pygame.quit()
-sys.exit()
+    # -------------------------
+    # RENDER
+    # -------------------------
+    # свёрнутое окно не рисуем вовсе, экономика при этом идёт
+    if pacer.should_render():
+        if perf_hud:
+            refresh_hud()
+        render_frame(mouse_pos, taisher_mode, frame_no)
+        if frame_no == 0:
+            startup.mark("first frame")
+            if PROFILE_STARTUP:
+                print(startup.report())
+        frame_no += 1
+    if music_pending and frame_no:
+        music_pending = False
+        stream_music()
+
+    allocs = surface_allocs()
+    prof.count("surface_allocs", allocs - allocs_seen)
+    allocs_seen = allocs
+    prof.count("particles", particles.count)
+    prof.count("toasts", len(state["toasts"]))
+    prof.count("notifications", len(state["notifications"]))
+    prof.end_frame()
+
+def main():
+    global save_writer, perf_log
+    save_writer = SaveWriter(SAVE_FILE)
+    sim.scheduler.schedule("autosave", sim.now + AUTOSAVE_EVERY, autosave)
+    if PERF_LOG:
+        perf_log = PerfLog(PERF_LOG, prof)
+        sim.scheduler.schedule("perf_log", sim.now + PERF_LOG_EVERY, dump_perf_log)
+
+    if FAST_START:
+        # первый кадр не ждёт музыку и фоны соседних званий
+        run_in_background(stream_assets)
+
+    while running:
+        # в простое спим ровно до ближайшего события планировщика
+        dt = clock.tick(pacer.target_fps(sim.time_until_next())) / 1000.0
+        # система спала — не гоняем тысячи тиков, а считаем остаток формулой
+        if dt > MAX_FRAME_DT:
+            sim.do("skip", dt - MAX_FRAME_DT)
+            dt = MAX_FRAME_DT
+        run_frame(dt)
+
+    # exit
+    if perf_log:
+        perf_log.dump(rank=state["rank"], kpi=state["kpi"])
+    if input_log:
+        input_log.close(sim)
+    save_writer.submit(sim.snapshot())
+    save_writer.close()
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
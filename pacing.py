@@ -0,0 +1,93 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: АДАПТИВНЫЙ FPS
+# ===============================
+# Полные 60 FPS нужны только пока игрок двигает мышь или идут
+# анимации. В простое хватает пары кадров в секунду, а свёрнутое
+# окно вообще не рисуем. Экономика считается по реальному dt,
+# так что от частоты кадров результат не зависит.
+
+import time
+
+import pygame
+
+ACTIVE_FPS = 60
+IDLE_FPS = 10
+HIDDEN_FPS = 2
+IDLE_AFTER = 3.0  # сек без ввода и анимаций -> простой
+MAX_FRAME_DT = 5.0  # кадр длиннее (сон системы) докидываем через sim.skip
+
+
+class FrameScheduler:
+    def __init__(self, active_fps=ACTIVE_FPS, idle_fps=IDLE_FPS, hidden_fps=HIDDEN_FPS,
+                 idle_after=IDLE_AFTER, clock=time.monotonic):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.hidden_fps = hidden_fps
+        self.idle_after = idle_after
+        self.clock = clock
+
+        self.visible = True
+        self.focused = True
+        self.last_activity = clock()
+
+    def poke(self):
+        """Ввод или анимация — вернуться на полную частоту."""
+        self.last_activity = self.clock()
+
+    def handle_event(self, event):
+        """Обновить активность/видимость окна по событию pygame.
+
+        Возвращает True, если окно только что снова стало видимым
+        (экран надо перерисовать целиком).
+        """
+        was_visible = self.visible
+        et = event.type
+
+        if et in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                  pygame.KEYDOWN, pygame.MOUSEWHEEL):
+            self.poke()
+
+        elif et == pygame.ACTIVEEVENT:
+            if event.state & pygame.APPACTIVE:
+                self.visible = bool(event.gain)
+            if event.state & pygame.APPINPUTFOCUS:
+                self.focused = bool(event.gain)
+
+        elif et in (getattr(pygame, "WINDOWMINIMIZED", -1), getattr(pygame, "WINDOWHIDDEN", -1)):
+            self.visible = False
+        elif et in (getattr(pygame, "WINDOWRESTORED", -1), getattr(pygame, "WINDOWSHOWN", -1),
+                    getattr(pygame, "WINDOWMAXIMIZED", -1), getattr(pygame, "WINDOWEXPOSED", -1)):
+            self.visible = True
+        elif et == getattr(pygame, "WINDOWFOCUSLOST", -1):
+            self.focused = False
+        elif et == getattr(pygame, "WINDOWFOCUSGAINED", -1):
+            self.focused = True
+            self.poke()
+
+        if self.visible and not was_visible:
+            self.poke()
+            return True
+        return False
+
+    def is_idle(self):
+        return (not self.focused) or (self.clock() - self.last_activity >= self.idle_after)
+
+    def should_render(self):
+        return self.visible
+
+    def target_fps(self, wakeup_in=None):
+        """Частота следующего кадра.
+
+        wakeup_in — сек до ближайшего запланированного события
+        (Scheduler.next_time); в простое просыпаемся ровно к нему,
+        а не на целый медленный кадр позже.
+        """
+        if not self.visible:
+            fps = self.hidden_fps
+        elif self.is_idle():
+            fps = self.idle_fps
+        else:
+            return self.active_fps
+        if wakeup_in is not None and wakeup_in < 1.0 / fps:
+            fps = min(self.active_fps, 1.0 / max(wakeup_in, 1.0 / self.active_fps))
+        return fps
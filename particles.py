@@ -0,0 +1,190 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ЧАСТИЦЫ
+# ===============================
+# Частицы живут в заранее выделенных колонках (x, y, vx, vy,
+# радиус, цвет) фиксированной ёмкости: первые `count` слотов живые.
+# Обновление — одной пачкой по всем колонкам, мёртвые выкидываются
+# swap-remove (последний живой переезжает на место мёртвого), так
+# что ни аллокаций, ни O(n²)-удалений нет. Если пул полон, новые
+# частицы по кругу занимают слоты уже живых.
+#
+# С NumPy всё считается векторно; без него — те же колонки на
+# array('d') и простой цикл (NumPy в сборке .exe не обязателен).
+# Случайность своя, с seed (поток "cosmetic" симуляции): частицы не
+# трогают общий random и не сдвигают игровые случайности.
+
+import math
+import random
+from array import array
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - зависит от окружения
+    np = None
+
+# оттенки «золота» — выбираются при рождении, а не каждый кадр
+PALETTE = [(255, g, 0) for g in range(120, 256, 17)]
+
+
+class ParticleSystem:
+    def __init__(self, capacity=4096, decay=7.2, seed=None):
+        self.capacity = capacity
+        self.decay = decay  # радиус/сек
+        self.count = 0
+        self._next_evict = 0
+        self._sprites = {}  # (радиус, цвет) -> Surface
+        self.allocs = 0
+        self.reseed(seed)
+        if np is not None:
+            self.pos = np.zeros((capacity, 2))
+            self.vel = np.zeros((capacity, 2))
+            self.radius = np.zeros(capacity)
+            self.color = np.zeros(capacity, dtype=np.int16)
+        else:
+            self.x = array("d", bytes(8 * capacity))
+            self.y = array("d", bytes(8 * capacity))
+            self.vx = array("d", bytes(8 * capacity))
+            self.vy = array("d", bytes(8 * capacity))
+            self.radius = array("d", bytes(8 * capacity))
+            self.color = array("h", bytes(2 * capacity))
+
+    def reseed(self, seed):
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed) if np is not None else None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    # -------------------------
+    # SPAWN
+    # -------------------------
+    def _slots(self, n):
+        """Индексы под n новых частиц: свободный хвост, потом занятые по кругу."""
+        n = min(n, self.capacity)
+        free = min(n, self.capacity - self.count)
+        slots = list(range(self.count, self.count + free))
+        self.count += free
+        for _ in range(n - free):
+            slots.append(self._next_evict)
+            self._next_evict = (self._next_evict + 1) % self.capacity
+        return slots
+
+    def burst(self, x, y, n, speed=360.0, radius=(4, 8)):
+        """Взрыв из точки (x, y): скорости равномерно в квадрате ±speed."""
+        slots = self._slots(n)
+        if not slots:
+            return
+        k = len(slots)
+        if np is not None:
+            idx = np.asarray(slots)
+            self.pos[idx] = (x, y)
+            rng = self.np_rng
+            self.vel[idx] = rng.uniform(-speed, speed, (k, 2))
+            self.radius[idx] = rng.integers(radius[0], radius[1] + 1, k)
+            self.color[idx] = rng.integers(0, len(PALETTE), k)
+        else:
+            rng = self.rng
+            for i in slots:
+                self.x[i] = x
+                self.y[i] = y
+                self.vx[i] = rng.uniform(-speed, speed)
+                self.vy[i] = rng.uniform(-speed, speed)
+                self.radius[i] = rng.randint(radius[0], radius[1])
+                self.color[i] = rng.randrange(len(PALETTE))
+
+    # -------------------------
+    # UPDATE
+    # -------------------------
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        if np is not None:
+            self.pos[:n] += self.vel[:n] * dt
+            self.radius[:n] -= self.decay * dt
+            dead = np.flatnonzero(self.radius[:n] <= 0)
+            if len(dead):
+                self._compact_np(dead)
+            return
+
+        decay = self.decay * dt
+        x, y, vx, vy, r = self.x, self.y, self.vx, self.vy, self.radius
+        i = 0
+        while i < n:
+            r[i] -= decay
+            if r[i] <= 0:
+                n -= 1
+                self._move(n, i)
+                continue  # на месте i теперь другая частица — её тоже надо обновить
+            x[i] += vx[i] * dt
+            y[i] += vy[i] * dt
+            i += 1
+        self.count = n
+
+    def _compact_np(self, dead):
+        # живые из хвоста переезжают в дыры, которые лежат до новой границы
+        n = self.count
+        alive_n = n - len(dead)
+        holes = dead[dead < alive_n]
+        tail = np.setdiff1d(np.arange(alive_n, n), dead, assume_unique=True)
+        for col in (self.pos, self.vel, self.radius, self.color):
+            col[holes] = col[tail]
+        self.count = alive_n
+
+    def _move(self, src, dst):
+        for col in (self.x, self.y, self.vx, self.vy, self.radius, self.color):
+            col[dst] = col[src]
+
+    # -------------------------
+    # DRAW
+    # -------------------------
+    def _sprite(self, r, c):
+        key = (r, c)
+        s = self._sprites.get(key)
+        if s is None:
+            s = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+            pygame.draw.circle(s, PALETTE[c], (r, r), r)
+            self._sprites[key] = s
+            self.allocs += 1
+        return s
+
+    def draw(self, surface):
+        """Один blits() на все частицы; спрайты кругов кэшируются."""
+        n = self.count
+        if not n:
+            return
+        if np is not None:
+            xs = self.pos[:n, 0].astype(int).tolist()
+            ys = self.pos[:n, 1].astype(int).tolist()
+            rs = np.maximum(1, self.radius[:n].astype(int)).tolist()
+            cs = self.color[:n].tolist()
+        else:
+            xs = [int(v) for v in self.x[:n]]
+            ys = [int(v) for v in self.y[:n]]
+            rs = [max(1, int(v)) for v in self.radius[:n]]
+            cs = self.color[:n].tolist()
+        sprite = self._sprite
+        surface.blits([(sprite(r, c), (x - r, y - r)) for x, y, r, c in zip(xs, ys, rs, cs)],
+                      doreturn=False)
+
+    def bounds(self):
+        """Прямоугольник, покрывающий все живые частицы (для dirty rects)."""
+        n = self.count
+        if not n:
+            return None
+        if np is not None:
+            x0, y0 = self.pos[:n].min(axis=0)
+            x1, y1 = self.pos[:n].max(axis=0)
+            pad = float(self.radius[:n].max())
+        else:
+            x0, x1 = min(self.x[:n]), max(self.x[:n])
+            y0, y1 = min(self.y[:n]), max(self.y[:n])
+            pad = max(self.radius[:n])
+        pad = math.ceil(pad) + 1
+        return pygame.Rect(int(x0) - pad, int(y0) - pad,
+                           int(x1 - x0) + 2 * pad + 1, int(y1 - y0) + 2 * pad + 1)
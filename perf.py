@@ -0,0 +1,207 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ЗАМЕРЫ
+# ===============================
+# Таймеры фаз запуска и секций кадра (экономика, ввод, отрисовка...).
+
+import json
+import math
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseTimer:
+    """Последовательные именованные фазы: with timer.phase("fonts"): ..."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases = []  # [(name, seconds)]
+
+    @contextmanager
+    def phase(self, name):
+        t0 = self.clock()
+        try:
+            yield
+        finally:
+            self.phases.append((name, self.clock() - t0))
+
+    def mark(self, name):
+        """Фаза «от старта до сейчас» (например, до первого кадра)."""
+        self.phases.append((name, self.clock() - self.started))
+
+    def as_dict(self):
+        return {name: round(sec * 1000.0, 3) for name, sec in self.phases}
+
+    def report(self, title="startup"):
+        lines = [f"[{title}] {name:<24} {sec * 1000.0:8.1f} ms" for name, sec in self.phases]
+        return "\n".join(lines)
+
+
+# -------------------------
+# FRAME PROFILER
+# -------------------------
+def percentile(values, q):
+    """q-й перцентиль (0..100) по ближайшему рангу; values не обязаны быть отсортированы."""
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = max(0, min(len(s) - 1, math.ceil(q / 100.0 * len(s)) - 1))
+    return s[k]
+
+
+class FrameProfiler:
+    """Время секций кадра: with prof.section("render"): ...
+
+    Считается собственное время секции — вложенная (например,
+    "achievements" внутри "economy") вычитается из внешней, так что
+    сумма секций равна работе кадра. end_frame() закрывает кадр;
+    последние history кадров хранятся для перцентилей. Рядом —
+    счётчики кадра (аллокации, число частиц...): count(name, n).
+    """
+
+    def __init__(self, history=600, clock=time.perf_counter):
+        self.clock = clock
+        self.frames = deque(maxlen=history)  # [{секция: сек, "work": ..., "frame": ...}]
+        self.counts = deque(maxlen=history)  # [{счётчик: число}] параллельно frames
+        self.total_frames = 0
+        self._cur = {}
+        self._cur_counts = {}
+        self._stack = []
+        self._last_end = None
+
+    @contextmanager
+    def section(self, name):
+        cur, stack = self._cur, self._stack
+        now = self.clock()
+        if stack:
+            parent = stack[-1]
+            cur[parent[0]] = cur.get(parent[0], 0.0) + now - parent[1]
+        entry = [name, now]
+        stack.append(entry)
+        try:
+            yield
+        finally:
+            now = self.clock()
+            stack.pop()
+            cur[name] = cur.get(name, 0.0) + now - entry[1]
+            if stack:
+                stack[-1][1] = now
+
+    def count(self, name, value=1):
+        self._cur_counts[name] = self._cur_counts.get(name, 0) + value
+
+    def end_frame(self):
+        now = self.clock()
+        frame = self._cur
+        frame["work"] = sum(frame.values())
+        # "frame" — от конца прошлого кадра, вместе со сном в clock.tick
+        frame["frame"] = frame["work"] if self._last_end is None else now - self._last_end
+        self._last_end = now
+        self.frames.append(frame)
+        self.counts.append(self._cur_counts)
+        self.total_frames += 1
+        self._cur = {}
+        self._cur_counts = {}
+        return frame
+
+    def reset(self):
+        self.frames.clear()
+        self.counts.clear()
+        self._cur = {}
+        self._cur_counts = {}
+        self._stack = []
+        self._last_end = None
+
+    @staticmethod
+    def _tail(seq, last):
+        items = list(seq)
+        return items if last is None or last >= len(items) else items[len(items) - last:]
+
+    def fps(self, last=None):
+        frames = self._tail(self.frames, last)
+        total = sum(f["frame"] for f in frames)
+        return len(frames) / total if total > 0 else 0.0
+
+    def summary(self, last=None):
+        """{секция: {mean, p50, p95, p99, max}} в мс по последним last кадрам (или всем)."""
+        frames = self._tail(self.frames, last)
+        names = []
+        for f in frames:
+            names.extend(k for k in f if k not in names)
+        out = {}
+        for name in names:
+            vals = [f.get(name, 0.0) * 1000.0 for f in frames]
+            out[name] = {
+                "mean": round(sum(vals) / len(vals), 4),
+                "p50": round(percentile(vals, 50), 4),
+                "p95": round(percentile(vals, 95), 4),
+                "p99": round(percentile(vals, 99), 4),
+                "max": round(max(vals), 4),
+            }
+        return out
+
+    def counter_summary(self, last=None):
+        """{счётчик: {mean, max}} за кадр; кадры без счётчика считаются нулём."""
+        counts = self._tail(self.counts, last)
+        names = []
+        for c in counts:
+            names.extend(k for k in c if k not in names)
+        return {
+            name: {
+                "mean": round(sum(c.get(name, 0) for c in counts) / len(counts), 3),
+                "max": max(c.get(name, 0) for c in counts),
+            }
+            for name in names
+        }
+
+
+class PerfLog:
+    """Периодический дамп замеров в JSON Lines (для сессий без присмотра).
+
+    Каждая dump() — одна строка со сводкой по кадрам с прошлого дампа.
+    """
+
+    def __init__(self, path, prof):
+        self.path = path
+        self.prof = prof
+        self._last_total = prof.total_frames
+
+    def dump(self, **extra):
+        prof = self.prof
+        n = min(len(prof.frames), prof.total_frames - self._last_total)
+        self._last_total = prof.total_frames
+        if n <= 0:
+            return None
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "frames": n,
+            "fps": round(prof.fps(n), 2),
+            "sections": prof.summary(n),
+            "counters": prof.counter_summary(n),
+        }
+        record.update(extra)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[WARN] Perf log failed: {self.path} -> {e}")
+        return record
+
+
+class NullProfiler:
+    """Заглушка с тем же интерфейсом — headless-прогоны не платят за замеры."""
+
+    _null = nullcontext()
+
+    def section(self, name):
+        return self._null
+
+    def count(self, name, value=1):
+        pass
+
+    def end_frame(self):
+        return {}
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,202 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: КЭШИ ОТРИСОВКИ
+# ===============================
+# Растеризация шрифта и полноэкранные SRCALPHA-заливки — самое
+# дорогое в кадре, а меняются они редко: держим готовые
+# поверхности и отдаём их повторно.
+
+from collections import OrderedDict
+
+import pygame
+
+
+def surface_bytes(surf):
+    return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+
+# -------------------------
+# TEXT CACHE (LRU)
+# -------------------------
+class TextCache:
+    """LRU-кэш поверхностей текста по ключу (font, text, color).
+
+    Ограничен и по числу записей, и по памяти. Возвращаемые
+    поверхности общие — их можно только блитать, не менять.
+    """
+
+    def __init__(self, max_items=512, max_bytes=4 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        surf = self._items.get(key)
+        if surf is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, True, color)
+        self._items[key] = surf
+        self.bytes += surface_bytes(surf)
+        self._evict()
+        return surf
+
+    def _evict(self):
+        while len(self._items) > 1 and (len(self._items) > self.max_items or self.bytes > self.max_bytes):
+            _, old = self._items.popitem(last=False)
+            self.bytes -= surface_bytes(old)
+
+    def clear(self):
+        self._items.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+# -------------------------
+# SURFACE POOL (translucent panels / overlays)
+# -------------------------
+class SurfacePool:
+    """Залитые SRCALPHA-поверхности по ключу (size, rgba).
+
+    Панели и оверлеи фиксированного размера строятся один раз;
+    при ресайзе или смене цвета просто появляется новый ключ,
+    а старые вытесняются по LRU. Как и TextCache, ограничен и по
+    числу записей, и по памяти: полноэкранная заливка — ~2 МБ.
+
+    Заливки, цвет которых плавно меняется (альфа от KPI), в пул не
+    кладём — для них refill(): одна поверхность на слот, при смене
+    цвета перезаливается на месте.
+    """
+
+    def __init__(self, max_items=64, max_bytes=16 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.allocs = 0
+        self._items = OrderedDict()
+        self._slots = {}  # slot -> [Surface, rgba]
+
+    def filled(self, size, rgba):
+        key = (tuple(size), tuple(rgba))
+        surf = self._items.get(key)
+        if surf is not None:
+            self._items.move_to_end(key)
+            return surf
+
+        surf = pygame.Surface(key[0], pygame.SRCALPHA)
+        surf.fill(key[1])
+        self.allocs += 1
+        self._items[key] = surf
+        self.bytes += surface_bytes(surf)
+        self._evict()
+        return surf
+
+    def refill(self, slot, size, rgba):
+        """Переиспользуемая заливка для слота: новая поверхность только при ресайзе."""
+        size, rgba = tuple(size), tuple(rgba)
+        entry = self._slots.get(slot)
+        if entry is None or entry[0].get_size() != size:
+            entry = self._slots[slot] = [pygame.Surface(size, pygame.SRCALPHA), None]
+            self.allocs += 1
+        if entry[1] != rgba:
+            entry[0].fill(rgba)
+            entry[1] = rgba
+        return entry[0]
+
+    def _evict(self):
+        while len(self._items) > 1 and (len(self._items) > self.max_items or self.bytes > self.max_bytes):
+            _, old = self._items.popitem(last=False)
+            self.bytes -= surface_bytes(old)
+
+    def clear(self):
+        self._items.clear()
+        self._slots.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+# -------------------------
+# DIRTY RECTS
+# -------------------------
+def merge_rects(rects, bounds):
+    """Склеить пересекающиеся прямоугольники и обрезать по экрану."""
+    out = []
+    for r in rects:
+        r = r.clip(bounds)
+        if r.w <= 0 or r.h <= 0:
+            continue
+        i = 0
+        while i < len(out):
+            if r.colliderect(out[i]):
+                r = r.union(out.pop(i))
+                i = 0
+            else:
+                i += 1
+        out.append(r)
+    return out
+
+
+class DirtyTracker:
+    """Какие области экрана поменялись с прошлого кадра.
+
+    На вход — {имя: (rect, подпись)} видимых виджетов. Область
+    грязная, если подпись изменилась, виджет появился или исчез;
+    тогда в список попадают и старый, и новый прямоугольники.
+    """
+
+    def __init__(self, screen_rect, full_ratio=0.6):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.full_ratio = full_ratio
+        self._prev = {}
+        self._full = True
+
+    def invalidate(self):
+        self._full = True
+
+    def collect(self, regions):
+        dirty = []
+        for name, (rect, sig) in regions.items():
+            old = self._prev.get(name)
+            if old is None or old[1] != sig:
+                if old is not None:
+                    dirty.append(old[0])
+                dirty.append(pygame.Rect(rect))
+        for name in self._prev.keys() - regions.keys():
+            dirty.append(self._prev[name][0])
+        self._prev = {name: (pygame.Rect(rect), sig) for name, (rect, sig) in regions.items()}
+
+        if self._full:
+            self._full = False
+            return [self.screen_rect.copy()]
+        rects = self._snap(merge_rects(dirty, self.screen_rect))
+        # почти весь экран грязный — проще обновить целиком
+        area = sum(r.w * r.h for r in rects)
+        if area > self.full_ratio * self.screen_rect.w * self.screen_rect.h:
+            return [self.screen_rect.copy()]
+        return rects
+
+    def _snap(self, rects):
+        # край клипа не должен резать виджет: толстые скруглённые рамки
+        # pygame рисует с клипом не так, как без него
+        widgets = [r for r, _ in self._prev.values()]
+        while True:
+            grown = []
+            for r in rects:
+                for w in widgets:
+                    if r.colliderect(w) and not r.contains(w):
+                        r = r.union(w)
+                grown.append(r)
+            grown = merge_rects(grown, self.screen_rect)
+            if grown == rects:
+                return rects
+            rects = grown
@@ -0,0 +1,174 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ЛОГ ВВОДА И ПОВТОР
+# ===============================
+# Сессия = seed + стартовое время + сейв, с которого начали, + всё,
+# что делал игрок (GameSimulation.do) с номером тика. Симуляция
+# детерминирована, поэтому по логу её можно прогнать заново без окна
+# и на полной скорости: воспроизвести баг или замерить регрессию на
+# одинаковой нагрузке.
+#
+# Формат — JSON Lines, только дописывается:
+#   {"format": "psi-input", "version": 1, "seed": ..., "now": ..., "dt": ..., "save": {...}}
+#   [тик, "click"]
+#   [тик, "building", 2, "max"]
+#   [тик, "end", {итог}]             <- при нормальном выходе, для сверки
+#
+#   python main.py --record                    # пишет session.psilog
+#   python replay.py session.psilog            # повтор + сверка с итогом
+#   python replay.py session.psilog --until 36000 --save bug.dat
+
+import argparse
+import json
+import sys
+import time
+
+from simulation import GameSimulation, TICK, fmt_duration
+
+LOG_FORMAT = "psi-input"
+LOG_VERSION = 1
+FLUSH_EVERY = 256  # записей; остальное дописывает flush()/close()
+
+
+def digest(sim):
+    """Короткий итог состояния — сверяется после повтора."""
+    st = sim.state
+    return {
+        "ticks": sim.ticks,
+        "salary": st["salary"].to_json(),
+        "boxes": st["boxes"].to_json(),
+        "kpi": st["kpi"],
+        "prestige": st["prestige"],
+        "clicks": st["clicks"],
+        "boss_wins": st["boss_wins"],
+        "buildings": [b.count for b in sim.buildings],
+    }
+
+
+class InputLog:
+    """Дописываемый лог ввода; подключается как sim.input_log."""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._f = open(path, "w", encoding="utf-8")
+
+    def start(self, sim, save=None):
+        """Заголовок: всё, чтобы собрать ту же симуляцию заново. Зовётся до первого step()."""
+        header = {
+            "format": LOG_FORMAT,
+            "version": LOG_VERSION,
+            "seed": sim.seed,
+            "now": sim.now,
+            "ticks": sim.ticks,
+            "dt": TICK,
+            "save": save,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._write(json.dumps(header, ensure_ascii=False))
+        sim.input_log = self
+
+    def record(self, tick, action, args=()):
+        self._write(json.dumps([tick, action, *args], separators=(",", ":")))
+        self.records += 1
+        if self.records % FLUSH_EVERY == 0:
+            self.flush()
+
+    def _write(self, line):
+        try:
+            self._f.write(line + "\n")
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Input log failed: {self.path} -> {e}")
+
+    def flush(self):
+        try:
+            self._f.flush()
+        except (OSError, ValueError):
+            pass
+
+    def close(self, sim=None):
+        """sim — дописать итог для сверки при повторе."""
+        if sim is not None:
+            self._write(json.dumps([sim.ticks, "end", digest(sim)], separators=(",", ":")))
+            sim.input_log = None
+        self._f.close()
+
+
+def read_log(path):
+    """(заголовок, записи); оборванная последняя строка (краш) пропускается."""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != LOG_FORMAT:
+            raise ValueError(f"{path}: not an input log")
+        if header.get("version", 1) > LOG_VERSION:
+            raise ValueError(f"{path}: log version {header['version']} is newer than {LOG_VERSION}")
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return header, records
+
+
+def replay(header, records, until=None):
+    """Прогнать лог на новой симуляции: (sim, итог из лога или None)."""
+    sim = GameSimulation(now=header["now"], seed=header["seed"])
+    if header.get("save") is not None:
+        sim.restore(header["save"])
+    dt = header.get("dt", TICK)
+    step = sim.step
+    for rec in records:
+        tick, action, args = rec[0], rec[1], rec[2:]
+        if until is not None and tick > until:
+            break
+        while sim.ticks < tick:
+            step(dt)
+        if action == "end":
+            return sim, args[0]
+        sim.do(action, *args)
+    if until is not None:
+        while sim.ticks < until:
+            step(dt)
+    return sim, None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay a recorded input log headlessly")
+    ap.add_argument("log")
+    ap.add_argument("--until", type=int, metavar="TICK", help="stop at this tick")
+    ap.add_argument("--save", metavar="FILE", help="write the resulting state as a save file")
+    ap.add_argument("--json", metavar="FILE", help="write timing and the final digest as JSON")
+    args = ap.parse_args(argv)
+
+    header, records = read_log(args.log)
+    t0 = time.perf_counter()
+    sim, expected = replay(header, records, args.until)
+    elapsed = time.perf_counter() - t0
+
+    sim_sec = sim.ticks * header.get("dt", TICK)
+    got = digest(sim)
+    print(f"{len(records)} records, {sim.ticks} ticks ({fmt_duration(sim_sec)} game time) "
+          f"in {elapsed:.2f}s — {sim.ticks / elapsed if elapsed else 0:,.0f} ticks/s")
+    for key, val in got.items():
+        print(f"  {key:<10} {val}")
+
+    ok = True
+    if expected is not None:
+        diff = {k: (expected[k], got.get(k)) for k in expected if expected[k] != got.get(k)}
+        ok = not diff
+        print("MATCH" if ok else "MISMATCH")
+        for k, (want, have) in diff.items():
+            print(f"  {k}: log {want} != replay {have}")
+
+    if args.save:
+        sim.save(args.save)
+        print(f"saved {args.save}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"elapsed": round(elapsed, 4), "ticks": sim.ticks, "records": len(records),
+                       "match": ok if expected is not None else None, "digest": got}, f, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ЗАПИСЬ СЕЙВОВ
+# ===============================
+# Сейв пишется в фоне: tmp-файл + fsync + атомарный rename, так что
+# при падении/отключении питания на диске всегда целый файл. Старый
+# сейв раз в BACKUP_EVERY сек уезжает в .bak — load откатится на него.
+#
+# Формат (save.dat): заголовок MAGIC | версия | crc32 | длина, дальше
+# zlib-сжатый компактный JSON. Старый save.json (версия 1) читается
+# и доводится миграциями до SAVE_VERSION. Деньги/пики, не влезающие
+# во float, пишутся парой [m, e] (см. bignum.Big) — остальные числом.
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+BACKUP_EVERY = 60.0  # сек между ротациями .bak
+BACKUPS = 2          # save.dat.bak1 (новее) ... .bakN (старше)
+
+
+def backup_paths(path, backups=BACKUPS):
+    return [f"{path}.bak{i}" for i in range(1, backups + 1)]
+
+
+def rotate_backups(path, backups=BACKUPS):
+    """save.dat -> .bak1 -> .bak2 ...; самый старый выпадает."""
+    if not os.path.exists(path):
+        return
+    paths = backup_paths(path, backups)
+    for i in range(len(paths) - 1, 0, -1):
+        if os.path.exists(paths[i - 1]):
+            os.replace(paths[i - 1], paths[i])
+    # текущий сейв копируем, а не переносим: он должен остаться на месте
+    with open(path, "rb") as f:
+        atomic_write(paths[0], f.read())
+
+
+def atomic_write(path, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_with_fallback(path, parse, backups=BACKUPS):
+    """Прочитать сейв, при ошибке — по очереди бэкапы. None, если ничего нет."""
+    for p in [path] + backup_paths(path, backups):
+        if not os.path.exists(p):
+            continue
+        try:
+            with open(p, "rb") as f:
+                data = parse(f.read())
+            if p != path:
+                print(f"[WARN] Save {path} unreadable, loaded backup {p}")
+            return data
+        except Exception as e:
+            print(f"[WARN] Load failed: {p} -> {e}")
+    return None
+
+
+def encode_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(raw):
+    return json.loads(raw.decode("utf-8"))
+
+
+# -------------------------
+# SAVE FORMAT + MIGRATIONS
+# -------------------------
+SAVE_VERSION = 2
+MAGIC = b"PSIS"
+_HEADER = struct.Struct("<4sHII")  # magic, version, crc32(payload), len(payload)
+
+
+def encode_save(data):
+    payload = zlib.compress(encode_json(data), 6)
+    version = data.get("version", SAVE_VERSION)
+    return _HEADER.pack(MAGIC, version, zlib.crc32(payload), len(payload)) + payload
+
+
+def decode_save(raw):
+    """Байты сейва -> dict текущей версии (бросает ValueError на битых данных)."""
+    if raw[:len(MAGIC)] == MAGIC:
+        _, version, crc, size = _HEADER.unpack_from(raw)
+        payload = raw[_HEADER.size:_HEADER.size + size]
+        if len(payload) != size or zlib.crc32(payload) != crc:
+            raise ValueError("save checksum mismatch")
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        data["version"] = version
+    else:
+        # старый save.json без версии
+        data = decode_json(raw)
+        data.setdefault("version", 1)
+    return migrate(data)
+
+
+def migrate(data):
+    version = data.get("version", 1)
+    if version > SAVE_VERSION:
+        raise ValueError(f"save version {version} is newer than supported {SAVE_VERSION}")
+    while version < SAVE_VERSION:
+        data = MIGRATIONS[version](dict(data))
+        version += 1
+        data["version"] = version
+    return data
+
+
+def _v1_to_v2(data):
+    # v1 (save.json) терял статистику, достижения и таймеры
+    data.setdefault("clicks", 0)
+    data.setdefault("earned_salary", 0.0)
+    data.setdefault("boss_wins", 0)
+    data.setdefault("total_boxes_earned", 0.0)
+    data.setdefault("unlocked", [])
+    return data
+
+
+MIGRATIONS = {
+    1: _v1_to_v2,
+}
+
+
+# -------------------------
+# BACKGROUND WRITER
+# -------------------------
+class SaveWriter:
+    """Фоновый писатель сейвов.
+
+    submit(snapshot) только кладёт снимок и будит поток — кадр не
+    ждёт диск. Пока поток пишет, новые снимки перезаписывают
+    ожидающий (пишется только последний); снимок, не отличающийся
+    от записанного (кроме ключей из ignore_keys), пропускается.
+    По умолчанию пишет формат save.dat (encode_save).
+    """
+
+    def __init__(self, path, encode=encode_save, ignore_keys=("saved_at",),
+                 backup_every=BACKUP_EVERY, backups=BACKUPS):
+        self.path = path
+        self.encode = encode
+        self.ignore_keys = ignore_keys
+        self.backup_every = backup_every
+        self.backups = backups
+
+        self.writes = 0
+        self.skipped = 0
+        self._last_written = None
+        self._last_backup = None  # первая запись сразу бэкапит сейв прошлой сессии
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot):
+        with self._cond:
+            self._pending = snapshot
+            self._cond.notify()
+
+    def flush(self):
+        """Дождаться записи всего, что уже отдано в submit()."""
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(snapshot)
+            except Exception as e:
+                print("[WARN] Save failed:", e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, snapshot):
+        key = {k: v for k, v in snapshot.items() if k not in self.ignore_keys}
+        if key == self._last_written:
+            self.skipped += 1
+            return
+        if self._last_backup is None or time.monotonic() - self._last_backup >= self.backup_every:
+            rotate_backups(self.path, self.backups)
+            self._last_backup = time.monotonic()
+        atomic_write(self.path, self.encode(snapshot))
+        self._last_written = key
+        self.writes += 1
+
@@ -0,0 +1,1265 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ЯДРО СИМУЛЯЦИИ
+# ===============================
+# Вся экономика без pygame: можно гонять headless
+# (баланс, регрессии), а main.py — только отрисовка и ввод.
+
+import random
+import time
+import math
+import heapq
+import bisect
+from dataclasses import dataclass
+
+from bignum import Big, fmt_big
+from perf import NULL_PROFILER
+from save_io import atomic_write, read_with_fallback, encode_save, decode_save, SAVE_VERSION
+
+# -------------------------
+# CONFIG
+# -------------------------
+FPS = 60
+TICK = 1.0 / FPS
+
+# Timers: всё в секундах и тикает от dt, а не от кадров
+AUTO_CLICK_INTERVAL = 61 / 60  # как раньше: раз в 61 кадр при 60 FPS
+EVENT_BONUS_TIME = 3.0
+EVENT_TIME = 5.0
+BOSS_TIME = 10.0
+LOOT_TIME = 10.0
+LEVEL_UP_TIME = 2.0
+FLASH_TIME = 0.3
+TOAST_TIME = 3.0
+NOTIFY_TIME = 2.7
+NOTIFY_SLIDE = 360.0  # px/сек, въезд уведомления сверху
+
+# обратные отсчёты в state, которые тикают в _tick_timers
+COUNTDOWN_KEYS = ("event_timer", "loot_timer", "level_up_timer", "flash")
+
+SAVE_FILE = "save.dat"
+LEGACY_SAVE_FILE = "save.json"  # формат до версии 2, читается с миграцией
+
+# Game constants
+CLICK_SALARY = 10
+CLICK_PENALTY = 50
+CLICK_PENALTY_CHANCE = 1 / 20
+AUTO_CLICK_COST = 5000
+KPI_UP_COST = 1000
+PRESTIGE_MIN_SALARY = 100000
+
+PRICE_GROWTH = 1.15  # каждое следующее здание дороже на 15%
+KPI_GOAL_START = 100  # пиков до KPI 2
+KPI_GOAL_GROWTH = 1.22  # каждая следующая цель KPI больше на 22%
+META_COST_GROWTH = 1.65
+OFFLINE_FLOAT_MAX = 1e300  # до этих целей KPI apply_offline считает во float
+
+# bulk buy modes (x1 / x10 / x100 / макс)
+BUY_MAX = "max"
+BUY_MODES = [1, 10, 100, BUY_MAX]
+
+# -------------------------
+# UTILS
+# -------------------------
+def fmt_int(n):
+    try:
+        return fmt_big(n)
+    except Exception:
+        return "0"
+
+def fmt_duration(seconds):
+    seconds = int(seconds)
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    if h:
+        return f"{h}ч {m:02d}м"
+    if m:
+        return f"{m}м {s:02d}с"
+    return f"{s}с"
+
+# -------------------------
+# DATA MODELS
+# -------------------------
+@dataclass
+class Building:
+    id: str
+    name: str
+    base_price: int
+    bps: float
+    count: int = 0
+
+    def _first(self, discount_mult):
+        return Big.pow(PRICE_GROWTH, self.count) * self.base_price * discount_mult
+
+    def price(self, discount_mult: float = 1.0) -> Big:
+        return self._first(discount_mult).floor()
+
+    def bulk_price(self, n: int, discount_mult: float = 1.0) -> Big:
+        # геометрическая сумма: first * (g^n - 1) / (g - 1)
+        if n <= 0:
+            return Big(0)
+        if n == 1:
+            return self.price(discount_mult)
+        return (self._first(discount_mult) * (Big.pow(PRICE_GROWTH, n) - 1) / (PRICE_GROWTH - 1)).floor()
+
+    def max_affordable(self, money, discount_mult: float = 1.0):
+        if money < self.price(discount_mult):
+            return 0
+        first = self._first(discount_mult)
+        n = int((money * (PRICE_GROWTH - 1) / first + 1).log10() / math.log10(PRICE_GROWTH))
+        # поправка на округление float/int — максимум пара шагов
+        while n > 1 and self.bulk_price(n, discount_mult) > money:
+            n -= 1
+        while self.bulk_price(n + 1, discount_mult) <= money:
+            n += 1
+        return max(1, n)
+
+def make_buildings():
+    return [
+        Building("sorter", "Сортировщик", 150, 0.3),
+        Building("buffer", "Буфер", 800, 1.5),
+        Building("mezz", "Мезонин", 4500, 6.0),
+        Building("autosort", "Автосорт", 25000, 25.0),
+    ]
+
+# -------------------------
+# RANKS
+# -------------------------
+@dataclass(frozen=True)
+class Rank:
+    min_kpi: int
+    name: str
+    mult: float
+    bg: str = None  # свой фон (main.py), None — общий BG_IMAGE
+
+# по возрастанию min_kpi; новое звание — просто ещё одна строка
+RANKS = [
+    Rank(0, "Новичок", 1.0, "bg_novice.jpg"),
+    Rank(5, "Стажёр", 1.05),
+    Rank(10, "Работяга", 1.10, "bg_worker.jpg"),
+    Rank(20, "Старший смены", 1.15),
+    Rank(35, "Тащер", 1.25, "bg_taicher.jpg"),
+    Rank(50, "Мастер склада", 1.35),
+    Rank(75, "Легенда смены", 1.50, "bg_legend.jpg"),
+    Rank(100, "Архитектор логистики", 1.75),
+    Rank(150, "Повелитель мезонина", 2.0),
+    Rank(250, "Инспектор хаоса", 2.5),
+    Rank(400, "Фиолетовый Бог", 3.0, "bg_god.jpg"),
+]
+RANK_THRESHOLDS = [r.min_kpi for r in RANKS]
+
+def rank_for_kpi(kpi_val):
+    """Строка RANKS для данного KPI — бинпоиск по порогам."""
+    return RANKS[max(0, bisect.bisect_right(RANK_THRESHOLDS, kpi_val) - 1)]
+
+# -------------------------
+# ACHIEVEMENTS
+# -------------------------
+# "stats" — от каких статов зависит cond: проверяется только то,
+# чьи статы поменялись с прошлого тика (см. GameSimulation.touch)
+ACHIEVEMENTS = [
+    {"id":"first_click", "name":"Первый пик", "desc":"Сделать первый клик",
+     "stats": ("clicks",), "cond": lambda st: st["clicks"] >= 1, "bonus": 0.02},
+    {"id":"kpi_25", "name":"KPI 25", "desc":"Достичь KPI 25",
+     "stats": ("kpi",), "cond": lambda st: st["kpi"] >= 25, "bonus": 0.05},
+    {"id":"build_10", "name":"Бригада", "desc":"Иметь 10 зданий",
+     "stats": ("total_buildings",), "cond": lambda st: st["total_buildings"] >= 10, "bonus": 0.03},
+    {"id":"prestige_1", "name":"Перерождение", "desc":"Сделать престиж 1 раз",
+     "stats": ("prestige",), "cond": lambda st: st["prestige"] >= 1, "bonus": 0.05},
+    {"id":"boss_win", "name":"Прошёл проверку", "desc":"Выиграть босса-проверку",
+     "stats": ("boss_wins",), "cond": lambda st: st["boss_wins"] >= 1, "bonus": 0.04},
+]
+
+# стат -> как его прочитать из симуляции
+ACH_STATS = {
+    "clicks": lambda sim: sim.state["clicks"],
+    "earned_salary": lambda sim: sim.state["earned_salary"],
+    "total_buildings": lambda sim: sum(b.count for b in sim.buildings),
+    "prestige": lambda sim: sim.state["prestige"],
+    "boss_wins": lambda sim: sim.state["boss_wins"],
+    "kpi": lambda sim: sim.state["kpi"],
+}
+
+# стат -> достижения, которые от него зависят
+ACH_ORDER = {a["id"]: i for i, a in enumerate(ACHIEVEMENTS)}
+ACH_BY_STAT = {}
+for _a in ACHIEVEMENTS:
+    for _stat in _a["stats"]:
+        ACH_BY_STAT.setdefault(_stat, []).append(_a)
+
+# -------------------------
+# META SHOP
+# -------------------------
+META_ITEMS = [
+    {"key":"income", "title":"+10% общий доход", "desc":"Умножает всё: клики/пассив/авто", "base_cost": 3},
+    {"key":"cheap",  "title":"-10% цены зданий", "desc":"Здания дешевле навсегда", "base_cost": 3},
+    {"key":"taisher","title":"+2 сек Тащер-режим", "desc":"Тащер длится дольше", "base_cost": 2},
+    {"key":"events", "title":"+25% длительность событий", "desc":"События держатся дольше", "base_cost": 2},
+]
+
+# -------------------------
+# RANDOMNESS
+# -------------------------
+# у каждой подсистемы свой поток: лишний клик или частица не сдвигают
+# события и босса, и прогон с тем же seed повторяется один в один
+RNG_STREAMS = ("events", "boss", "loot", "clicks", "cosmetic")
+
+def make_rngs(seed):
+    # строковый seed хэшируется детерминированно (не зависит от PYTHONHASHSEED)
+    return {name: random.Random(f"{seed}:{name}") for name in RNG_STREAMS}
+
+def binomial(rng, n, p):
+    """Сколько из n испытаний с вероятностью p успешны — за O(n*p), а не O(n).
+
+    Прыгаем между успехами геометрическими шагами (точное распределение,
+    random.binomialvariate есть только с Python 3.12).
+    """
+    if p <= 0.0 or n <= 0:
+        return 0
+    if p >= 1.0:
+        return n
+    log_q = math.log(1.0 - p)
+    k = 0
+    i = int(math.log(1.0 - rng.random()) / log_q) + 1
+    while i <= n:
+        k += 1
+        i += int(math.log(1.0 - rng.random()) / log_q) + 1
+    return k
+
+# -------------------------
+# GAME STATE (single dict to keep it clean)
+# -------------------------
+def new_state(now, rng):
+    return {
+        # деньги/пики/цели — Big: к поздней игре они уходят за 1e308
+        "boxes": Big(0),
+        "salary": Big(0),
+        "kpi": 1,
+        "upgrade_goal": Big(KPI_GOAL_START),
+
+        "auto_click": False,
+        "autobuy": False,
+
+        "prestige": 0,
+        "prestige_mult": 1.0,
+
+        # meta upgrades
+        "meta": {"income": 0, "cheap": 0, "taisher": 0, "events": 0},
+
+        # events
+        "event_active": False,
+        "event_text": "",
+        "event_timer": 0.0,
+        "event_mult": 1.0,
+        "next_event_time": now + rng["events"].randint(20, 35),
+
+        "loot_active": False,
+        "loot_timer": 0.0,
+        "next_loot_time": now + rng["loot"].randint(20, 40),
+
+        # stats
+        "clicks": 0,
+        "earned_salary": Big(0),
+        "boss_wins": 0,
+
+        # ui/feedback
+        "rank": RANKS[0].name,
+        "flash": 0.0,
+        "level_up": False,
+        "level_up_timer": 0.0,
+
+        "toasts": [],          # [{text,timer}]
+        "notifications": [],   # [{text,timer,y_offset,color}]
+    }
+
+# -------------------------
+# SCHEDULER
+# -------------------------
+class Scheduler:
+    """Мин-куча (время, seq, имя, callback) для редких таймеров игры.
+
+    Вместо «if now >= next_...» на каждую систему в каждом кадре
+    снимаем с кучи только наступившие записи. Одно имя — одна живая
+    запись: повторный schedule() делает старую устаревшей (ленивое
+    удаление). callback(at) получает плановое время и может
+    перепланировать себя.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._live = {}  # name -> seq актуальной записи
+        self._seq = 0
+
+    def schedule(self, name, at, callback):
+        self._seq += 1
+        self._live[name] = self._seq
+        heapq.heappush(self._heap, (at, self._seq, name, callback))
+
+    def cancel(self, name):
+        self._live.pop(name, None)
+
+    def _prune(self):
+        heap = self._heap
+        while heap and self._live.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def next_time(self):
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now):
+        fired = 0
+        while True:
+            self._prune()
+            if not self._heap or self._heap[0][0] > now:
+                return fired
+            at, _, name, callback = heapq.heappop(self._heap)
+            del self._live[name]
+            callback(at)
+            fired += 1
+
+    def __contains__(self, name):
+        return name in self._live
+
+    def __len__(self):
+        return len(self._live)
+
+# -------------------------
+# AUTO-BUYER
+# -------------------------
+class AutoBuyer:
+    """Авто-закупка по окупаемости: сначала то, что быстрее всего отобьётся.
+
+    Ключ кучи — цена / прирост пиков в секунду. Все покупки за
+    зарплату окупаются через один и тот же множитель (доход x
+    CLICK_SALARY), так что порядок по этому ключу равен порядку по
+    окупаемости в секундах, а смена события/звания/престижа кучу не
+    трогает. Изменилось здание — перекладываем только его запись
+    (+ KPI, который зависит от суммарного bps); устаревшие записи
+    выкидываются лениво, как в Scheduler. Мета-магазин (жетоны,
+    а не зарплата) пересматривается только когда меняются жетоны.
+    """
+
+    MAX_BUYS_PER_TICK = 20
+
+    def __init__(self, sim):
+        self.sim = sim
+        self._heap = []
+        self._live = {}  # покупка -> seq актуальной записи
+        self._seq = 0
+        self._kpi = None  # KPI и жетоны, под которые посчитаны записи
+        self._tokens = None
+        self.bought = 0
+        self.rebuild()
+
+    def _push(self, name, key):
+        # цена едет в записи: меняется только вместе с ключом
+        self._seq += 1
+        if key is None:
+            self._live.pop(name, None)
+            return
+        self._live[name] = self._seq
+        heapq.heappush(self._heap, (key, self._seq, name, self._price(name)))
+        if len(self._heap) > 8 * len(self._live) + 16:
+            # устаревшие записи не всплывают наверх, пока лучшая живая стоит — чистим разом
+            self._heap = [e for e in self._heap if self._live.get(e[2]) == e[1]]
+            heapq.heapify(self._heap)
+
+    def _peek(self):
+        heap = self._heap
+        while heap and self._live.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    # -------------------------
+    # KEYS (цена / прирост пиков в секунду)
+    # -------------------------
+    def _building_key(self, idx):
+        # в Big: после 1e308 float(цена) — inf, и все здания сравнялись бы.
+        # До 1e308 частное бит в бит как у float; с float-ключами KPI/авто
+        # Big сравнивается напрямую
+        b = self.sim.buildings[idx]
+        return b.price(self.sim.discount_mult()) / b.bps
+
+    def _kpi_key(self):
+        # KPI сам по себе зарплату не растит — только звание; прирост
+        # следующего звания делим на число KPI до него
+        sim = self.sim
+        kpi = sim.state["kpi"]
+        i = bisect.bisect_right(RANK_THRESHOLDS, kpi)
+        base = sim.total_bps()
+        if i >= len(RANKS) or base <= 0:
+            return None
+        # текущее звание — тоже по kpi: sim.rank догонит его только в следующем тике
+        gain = base * (RANKS[i].mult / RANKS[i - 1].mult - 1.0) / (RANKS[i].min_kpi - kpi)
+        return KPI_UP_COST / gain
+
+    def _auto_key(self):
+        # авто = CLICK_SALARY * доход раз в AUTO_CLICK_INTERVAL, то есть 1/interval пиков/сек
+        if self.sim.state["auto_click"]:
+            return None
+        return AUTO_CLICK_COST * AUTO_CLICK_INTERVAL
+
+    def _price(self, name):
+        sim = self.sim
+        if name == "kpi":
+            return KPI_UP_COST
+        if name == "auto":
+            return AUTO_CLICK_COST
+        return sim.buildings[name].price(sim.discount_mult())
+
+    # -------------------------
+    # UPDATES
+    # -------------------------
+    def rebuild(self):
+        """Всё с нуля: престиж, загрузка, скидка из мета-магазина."""
+        self._heap = []
+        self._live = {}
+        for idx in range(len(self.sim.buildings)):
+            self._push(idx, self._building_key(idx))
+        self._push("auto", self._auto_key())
+        self._push("kpi", self._kpi_key())
+        self._kpi = self.sim.state["kpi"]
+
+    def building_changed(self, idx):
+        self._push(idx, self._building_key(idx))
+        self._push("kpi", self._kpi_key())
+
+    def payback(self):
+        """(покупка, секунд до окупаемости) для лучшей записи или None."""
+        top = self._peek()
+        if top is None:
+            return None
+        rate = self.sim.income_mult() * CLICK_SALARY
+        return top[2], float(top[0] / rate) if rate > 0 else math.inf
+
+    # -------------------------
+    # TICK
+    # -------------------------
+    def tick(self):
+        sim = self.sim
+        st = sim.state
+        if st["kpi"] != self._kpi:
+            self._kpi = st["kpi"]
+            self._push("kpi", self._kpi_key())
+        if st["prestige"] != self._tokens:
+            self._buy_meta()
+
+        for _ in range(self.MAX_BUYS_PER_TICK):
+            top = self._peek()
+            # копим на лучшую по окупаемости покупку, даже если дешёвые по карману
+            if top is None or st["salary"] < top[3]:
+                return
+            name = top[2]
+            if name == "kpi":
+                sim.buy_kpi()
+                self._kpi = st["kpi"]
+                self._push("kpi", self._kpi_key())
+            elif name == "auto":
+                sim.buy_auto()  # пересоберёт кучу сам
+            else:
+                sim.buy_building(name, 1, quiet=True)  # запись обновит building_changed
+            self.bought += 1
+
+    def _meta_gain(self, key, cost):
+        # прирост prestige_mult за покупку минус потеря от потраченных жетонов (0.05 за штуку)
+        st = self.sim.state
+        if key == "income":
+            gain = 0.10
+        elif key == "cheap":
+            disc = self.sim.discount_mult()
+            new_disc = max(0.2, disc - 0.10)
+            gain = st["prestige_mult"] * (disc / new_disc - 1.0)
+        else:
+            return None  # длительности Тащера/событий в доход не пересчитываются
+        return gain - 0.05 * cost
+
+    def _buy_meta(self):
+        sim = self.sim
+        st = sim.state
+        while True:
+            best = None
+            for item in META_ITEMS:
+                cost = sim.meta_cost(item["key"], item["base_cost"])
+                gain = self._meta_gain(item["key"], cost)
+                if gain is not None and gain > 0 and cost <= st["prestige"]:
+                    if best is None or gain / cost > best[0]:
+                        best = (gain / cost, item["key"])
+            if best is None or not sim.buy_meta(best[1]):
+                break
+            self.bought += 1
+        self._tokens = st["prestige"]
+
+# -------------------------
+# SIMULATION
+# -------------------------
+class GameSimulation:
+    """Экономика игры без дисплея.
+
+    step(dt) — один тик длиной dt сек, advance(seconds) — прогон вперёд.
+    Окно в main.py только рисует state и переводит клики в действия
+    через do() — его и пишет лог ввода (см. replay.py).
+
+    seed задаёт все случайности (make_rngs), clock — откуда брать
+    «сейчас» при создании; с одинаковыми seed/now и одним и тем же
+    вводом симуляция детерминирована.
+    """
+
+    def __init__(self, now=None, seed=None, clock=time.time):
+        self.clock = clock
+        now = clock() if now is None else now
+        self.now = now
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.rng = make_rngs(self.seed)
+        self.ticks = 0  # сколько step() прошло — время записей лога ввода
+        self.input_log = None  # replay.InputLog, если сессия пишется
+        self.state = new_state(now, self.rng)
+        self.buildings = make_buildings()
+        self.unlocked = set()
+        self.ach_mult = 1.0  # мультик достижений, пересчитываем из unlocked
+        self._touched = set(ACH_STATS)  # статы, изменившиеся с прошлой проверки
+        self._income = None  # кэш income_breakdown(), см. invalidate_income
+        self.rank = RANKS[0]  # текущая строка RANKS
+        self._rank_kpi = self.state["kpi"]  # KPI, для которого она посчитана
+
+        # boss check
+        self.boss_active = False
+        self.boss_timer = 0.0
+        self.boss_goal = 0
+        self.boss_progress = 0
+        self.total_boxes_earned = Big(0)
+        self.boss_start_earned = Big(0)
+        self.next_boss_time = now + self.rng["boss"].randint(120, 180)
+
+        # view hook: вызывается при новом звании (частицы и т.п.)
+        self.on_rank_up = None
+        # растёт при каждой смене числа зданий или скидки (покупки, в т.ч.
+        # авто-закупкой, престиж, загрузка) — окно по нему обновляет подписи цен
+        self.shop_changes = 0
+        # секции "events"/"achievements" для perf.FrameProfiler
+        self.profiler = NULL_PROFILER
+        self.autobuyer = None  # AutoBuyer, пока включена авто-закупка
+
+        self._pending = 0.0  # недотиканное время для advance()
+
+        # события/лут/босс/авто — в одной куче, см. Scheduler
+        self.scheduler = Scheduler()
+        self.scheduler.schedule("event", self.state["next_event_time"], self._on_event_due)
+        self.scheduler.schedule("loot", self.state["next_loot_time"], self._on_loot_due)
+        self.scheduler.schedule("boss", self.next_boss_time, self._on_boss_due)
+
+        self.recalc_prestige_mult()
+        self.recalc_ach_mult()
+
+    # -------------------------
+    # STATE HELPERS
+    # -------------------------
+    def recalc_prestige_mult(self):
+        p = self.state["prestige"]
+        meta_income = self.state["meta"]["income"]
+        self.state["prestige_mult"] = 1.0 + 0.05 * p + 0.10 * meta_income
+        self.invalidate_income()
+
+    def touch(self, *stats):
+        """Отметить изменившиеся статы — их достижения проверятся в конце тика."""
+        self._touched.update(stats)
+
+    def recalc_ach_mult(self):
+        m = 1.0
+        for a in ACHIEVEMENTS:
+            if a["id"] in self.unlocked:
+                m *= (1.0 + a.get("bonus", 0.0))
+        self.ach_mult = m
+        self.invalidate_income()
+
+    def discount_mult(self):
+        # cheap meta: -10% each level
+        lvl = self.state["meta"]["cheap"]
+        return max(0.2, 1.0 - 0.10 * lvl)
+
+    # -------------------------
+    # INCOME (memoised)
+    # -------------------------
+    def invalidate_income(self):
+        """Сбросить кэш дохода: поменялись здания, престиж/мета, событие, достижения или звание."""
+        self._income = None
+
+    def income_breakdown(self):
+        """Множители по источникам + итог; пересчёт только после invalidate_income()."""
+        b = self._income
+        if b is None:
+            st = self.state
+            b = {
+                "prestige": st["prestige_mult"],
+                "event": st["event_mult"],
+                "achievements": self.ach_mult,
+                "rank": self.rank.mult,
+            }
+            b["total"] = b["prestige"] * b["event"] * b["achievements"] * b["rank"]
+            b["base_bps"] = sum(x.bps * x.count for x in self.buildings)
+            b["bps"] = b["base_bps"] * b["total"]
+            self._income = b
+        return b
+
+    def total_bps(self):
+        return self.income_breakdown()["base_bps"]
+
+    def income_mult(self):
+        return self.income_breakdown()["total"]
+
+    def income_rate(self):
+        """Пиков в секунду с учётом всех множителей."""
+        return self.income_breakdown()["bps"]
+
+    def meta_cost(self, key, base):
+        lvl = self.state["meta"].get(key, 0)
+        return int(base * (META_COST_GROWTH ** lvl))
+
+    def add_boxes(self, amount):
+        self.state["boxes"] += amount
+
+    def add_boxes_earned(self, amount):
+        self.total_boxes_earned += amount
+        self.add_boxes(amount)
+
+    def add_salary(self, amount):
+        # amount — float или Big; сумма всегда Big
+        self.state["salary"] += amount
+        if amount > 0:
+            self.state["earned_salary"] += amount
+            self._touched.add("earned_salary")
+
+    def toast(self, text: str, timer: float = TOAST_TIME):
+        self.state["toasts"].append({"text": text, "timer": timer})
+
+    def notify(self, text: str, color=(255,255,255)):
+        self.state["notifications"].append({
+            "text": text,
+            "timer": NOTIFY_TIME,
+            "y_offset": -60,
+            "color": color
+        })
+
+    def is_taisher_now(self):
+        base = 3.0
+        extra = self.state["meta"]["taisher"] * 2.0
+        return (self.now % 15.0) < (base + extra)
+
+    # -------------------------
+    # RANDOM EVENTS
+    # -------------------------
+    def start_random_event(self, now):
+        state = self.state
+        rng = self.rng["events"]
+        etype = rng.choice(["bonus", "debuff", "boost"])
+        state["event_active"] = True
+        state["event_mult"] = 1.0
+        self.invalidate_income()
+
+        if etype == "bonus":
+            bonus = rng.randint(1000, 5000)
+            self.add_salary(bonus)
+            state["event_text"] = f"СРОЧНАЯ ПОСТАВКА! +{fmt_int(bonus)}Р"
+            state["event_timer"] = EVENT_BONUS_TIME
+            self.notify(state["event_text"], (255, 255, 255))
+
+        elif etype == "debuff":
+            state["event_mult"] = 0.5
+            self.invalidate_income()
+            state["event_text"] = "ПРОВЕРКА! -50% дохода"
+            state["event_timer"] = EVENT_TIME
+            self.notify(state["event_text"], (255, 170, 170))
+
+        else:
+            state["event_mult"] = 3.0
+            self.invalidate_income()
+            state["event_text"] = "ГОРЯЧАЯ СМЕНА! x3 доход"
+            state["event_timer"] = EVENT_TIME
+            self.notify(state["event_text"], (255, 255, 0))
+
+        # meta: longer events
+        if state["meta"]["events"] > 0:
+            state["event_timer"] = state["event_timer"] * (1.0 + 0.25 * state["meta"]["events"])
+
+        state["next_event_time"] = now + rng.randint(25, 45)
+        self.scheduler.schedule("event", state["next_event_time"], self._on_event_due)
+
+    # -------------------------
+    # TICK
+    # -------------------------
+    def step(self, dt):
+        self.now += dt
+        self.ticks += 1
+        now = self.now
+        state = self.state
+
+        self._tick_timers(dt)
+
+        # PASSIVE INCOME (bps)
+        bps = self.income_rate()
+        self.add_boxes_earned(bps * dt)
+        self.add_salary((bps * CLICK_SALARY) * dt)
+
+        # SCHEDULED: auto click, random event, loot, boss spawn (+ autosave окна)
+        with self.profiler.section("events"):
+            self.scheduler.run_due(now)
+
+            if state["event_active"] and state["event_timer"] <= 0:
+                state["event_active"] = False
+                state["event_mult"] = 1.0
+                self.invalidate_income()
+
+            self._tick_boss(now)
+
+        # BOX UPGRADE (kpi level); при крупном dt может быть несколько
+        while state["boxes"] >= state["upgrade_goal"]:
+            state["boxes"] -= state["upgrade_goal"]
+            state["kpi"] += 1
+            state["upgrade_goal"] = (state["upgrade_goal"] * KPI_GOAL_GROWTH).floor()
+            self.touch("kpi")
+
+        if state["level_up"] and state["level_up_timer"] <= 0:
+            state["level_up"] = False
+
+        self._update_rank()
+        with self.profiler.section("achievements"):
+            self._check_achievements()
+
+        if self.autobuyer:
+            self.autobuyer.tick()
+
+    def time_until_next(self):
+        """Сколько сек до ближайшей записи планировщика (None — пусто)."""
+        t = self.scheduler.next_time()
+        return None if t is None else max(0.0, t - self.now)
+
+    def advance(self, seconds, dt=TICK):
+        """Прогнать симуляцию на seconds вперёд тиками по dt.
+
+        Неполный тик копится до следующего вызова, поэтому окно
+        может звать advance(реальный dt) с любой частотой кадров.
+        Таймеры в секундах, так что headless-прогону хватает
+        крупного dt (например, 0.25–1 сек).
+        """
+        self._pending += seconds
+        while self._pending >= dt:
+            self.step(dt)
+            self._pending -= dt
+
+    # -------------------------
+    # OFFLINE PROGRESS
+    # -------------------------
+    def apply_offline(self, seconds):
+        """Начислить доход за время отсутствия аналитически.
+
+        Пассив и авто-клик считаются как поток пиков/сек (все множители,
+        кроме события); KPI-цели растут в 1.22 раза, поэтому цикл идёт
+        по апгрейдам KPI, а не по кадрам — O(log) итераций даже за
+        несколько дней. Внутри отрезка между апгрейдами доход постоянный,
+        звание (и его множитель) берём по KPI этого отрезка. Пока цели
+        меньше OFFLINE_FLOAT_MAX, цикл крутится на float (результат тот
+        же, что в Big, но без его накладных).
+        События и босс оффлайн не срабатывают (event_mult = 1).
+        """
+        if seconds <= 0:
+            return None
+        state = self.state
+        inc = self.income_breakdown()
+        base_m = inc["prestige"] * inc["achievements"]
+        base_bps = inc["base_bps"]
+        auto = state["auto_click"]
+
+        kpi_before = kpi = state["kpi"]
+        goal, have = state["upgrade_goal"], state["boxes"]
+        if goal < OFFLINE_FLOAT_MAX and have < OFFLINE_FLOAT_MAX:
+            goal, have = float(goal), float(have)
+        boxes = 0.0
+        salary = 0.0
+        left = seconds
+        while left > 0:
+            if type(goal) is float and goal > OFFLINE_FLOAT_MAX:
+                goal, have = Big(goal), Big(have)
+            m = base_m * rank_for_kpi(kpi).mult
+            bps = base_bps * m
+            # авто даёт kpi * m пиков и CLICK_SALARY * m зарплаты раз в интервал
+            auto_rate = m / AUTO_CLICK_INTERVAL if auto else 0.0
+            rate = bps + kpi * auto_rate
+            need = goal - have
+            if need <= 0:
+                t = 0.0
+            elif rate <= 0:
+                break
+            else:
+                t = float(need / rate)
+            last = t > left  # до следующего апгрейда не дотянули
+            if last:
+                t = left
+            have += rate * t
+            boxes += rate * t
+            salary += (bps + auto_rate) * CLICK_SALARY * t
+            left -= t
+            if last:
+                break
+            have -= goal
+            kpi += 1
+            goal = goal * KPI_GOAL_GROWTH
+            goal = goal.floor() if type(goal) is Big else float(math.floor(goal))
+
+        state["kpi"] = kpi
+        state["upgrade_goal"] = Big.of(goal)
+        state["boxes"] = Big.of(have)
+        self.total_boxes_earned += boxes
+        self.add_salary(salary)
+        if kpi != kpi_before:
+            self.touch("kpi")
+
+        summary = {
+            "seconds": seconds,
+            "salary": salary,
+            "boxes": boxes,
+            "kpi": kpi - kpi_before,
+        }
+        if seconds >= 60 and (salary > 0 or boxes > 0):
+            text = f"Пока тебя не было {fmt_duration(seconds)}: +{fmt_int(salary)}Р"
+            if summary["kpi"]:
+                text += f", KPI +{summary['kpi']}"
+            self.notify(text, (255, 215, 0))
+        return summary
+
+    def skip(self, seconds):
+        """Перемотать время без покадрового прогона (сон ноутбука и т.п.)."""
+        summary = self.apply_offline(seconds)
+        # таймер проверки на перемотке стоит — и пики за неё не засчитываем,
+        # как в _restore_timers
+        if summary and self.boss_active:
+            self.boss_start_earned += summary["boxes"]
+        self.now += seconds
+        self._pending = 0.0
+        # авто уже начислено формулой — не догоняем его тысячами срабатываний
+        if self.state["auto_click"]:
+            self._schedule_auto(self.now + AUTO_CLICK_INTERVAL)
+
+    # -------------------------
+    # SCHEDULED SYSTEMS
+    # -------------------------
+    def _schedule_auto(self, at):
+        self.scheduler.schedule("auto", at, self._on_auto_due)
+
+    def _on_auto_due(self, at):
+        if not self.state["auto_click"]:
+            return
+        mult = self.income_mult()
+        self.add_boxes_earned(self.state["kpi"] * mult)
+        self.add_salary(CLICK_SALARY * mult)
+        # от планового времени: при крупном dt сработает несколько раз
+        self._schedule_auto(at + AUTO_CLICK_INTERVAL)
+
+    def _on_event_due(self, at):
+        if self.state["event_active"]:
+            # прошлое ещё идёт — заглянем, когда закончится
+            self.scheduler.schedule("event", self.now + self.state["event_timer"] + TICK, self._on_event_due)
+            return
+        self.start_random_event(self.now)
+
+    def _on_loot_due(self, at):
+        self.state["loot_active"] = True
+        self.state["loot_timer"] = LOOT_TIME
+
+    def _on_boss_due(self, at):
+        state = self.state
+        self.boss_active = True
+        self.boss_timer = BOSS_TIME
+        self.boss_goal = int(60 + (self.total_bps() * 10) + state["kpi"] * 5)
+        self.boss_start_earned = self.total_boxes_earned
+        self.toast("НАЧАЛЬСТВО: ПРОВЕРКА! УСПЕЙ!", 3.7)
+
+    def _tick_boss(self, now):
+        state = self.state
+        if self.boss_active:
+            self.boss_progress = int(self.total_boxes_earned - self.boss_start_earned)
+
+            if self.boss_timer <= 0:
+                self.boss_active = False
+                if self.boss_progress >= self.boss_goal:
+                    reward = int(5000 + self.boss_goal * 8)
+                    self.add_salary(reward)
+                    state["boss_wins"] += 1
+                    self.touch("boss_wins")
+                    self.toast(f"ПРОВЕРКА ПРОЙДЕНА! +{fmt_int(reward)}Р", 4.0)
+                    self.notify("Проверка пройдена!", (255, 255, 0))
+                else:
+                    penalty = int(2000 + self.boss_goal * 3)
+                    self.add_salary(-penalty)
+                    self.toast(f"ПРОВАЛ! -{fmt_int(penalty)}Р", 4.0)
+                    self.notify("Провал проверки!", (255, 160, 160))
+                self.next_boss_time = now + self.rng["boss"].randint(120, 240)
+                self.scheduler.schedule("boss", self.next_boss_time, self._on_boss_due)
+
+    def _update_rank(self):
+        # звание меняется только вместе с KPI — в остальные тики одно сравнение int
+        state = self.state
+        if state["kpi"] == self._rank_kpi:
+            return
+        self._rank_kpi = state["kpi"]
+        rank = rank_for_kpi(state["kpi"])
+        if rank is self.rank:
+            return
+        self.rank = rank
+        state["rank"] = rank.name
+        state["level_up"] = True
+        state["level_up_timer"] = LEVEL_UP_TIME
+        state["flash"] = FLASH_TIME
+        self.invalidate_income()
+        if self.on_rank_up:
+            self.on_rank_up(rank.name)
+        self.toast(f"НОВОЕ ЗВАНИЕ: {rank.name}", 3.7)
+
+    def set_autobuy(self, on):
+        self.state["autobuy"] = bool(on)
+        self.autobuyer = AutoBuyer(self) if on else None
+
+    def sync_rank(self):
+        """Звание по текущему KPI без поздравлений (загрузка, престиж, правка state)."""
+        self._rank_kpi = self.state["kpi"]
+        self.rank = rank_for_kpi(self._rank_kpi)
+        self.state["rank"] = self.rank.name
+        self.invalidate_income()
+
+    def _check_achievements(self):
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, set()
+        candidates = {}  # id -> ачивка; по id, а не поиском по списку словарей
+        for stat in touched:
+            for a in ACH_BY_STAT.get(stat, ()):
+                if a["id"] not in self.unlocked:
+                    candidates[a["id"]] = a
+        if not candidates:
+            return
+        # читаем только нужные статы (total_buildings — сумма по зданиям)
+        needed = {stat for a in candidates.values() for stat in a["stats"]}
+        ach_state = {stat: ACH_STATS[stat](self) for stat in needed}
+        # порядок обхода touched зависит от PYTHONHASHSEED — открываем в
+        # порядке ACHIEVEMENTS, а мультик пересчитываем целиком, как при
+        # загрузке: иначе повтор лога расходится в последнем бите
+        unlocked = False
+        for aid in sorted(candidates, key=ACH_ORDER.__getitem__):
+            a = candidates[aid]
+            if a["cond"](ach_state):
+                self.unlocked.add(aid)
+                unlocked = True
+                self.toast(f"Достижение: {a['name']}", 4.0)
+                self.notify(f"Достижение: {a['name']}", (255, 210, 255))
+        if unlocked:
+            self.recalc_ach_mult()
+
+    # -------------------------
+    # TIMERS
+    # -------------------------
+    def _tick_timers(self, dt):
+        # все обратные отсчёты в одном месте; реакции на истечение — в step
+        state = self.state
+        for key in COUNTDOWN_KEYS:
+            if state[key] > 0:
+                state[key] = max(0.0, state[key] - dt)
+        if self.boss_timer > 0:
+            self.boss_timer = max(0.0, self.boss_timer - dt)
+
+        # тосты/уведомления живут в state, отрисовка их только читает
+        for t in state["toasts"]:
+            t["timer"] -= dt
+        state["toasts"][:] = [t for t in state["toasts"] if t["timer"] > 0]
+
+        for note in state["notifications"]:
+            note["timer"] -= dt
+            if note["y_offset"] < 0:
+                note["y_offset"] = min(0.0, note["y_offset"] + NOTIFY_SLIDE * dt)
+        state["notifications"][:] = [n for n in state["notifications"] if n["timer"] > 0]
+
+    # -------------------------
+    # PLAYER ACTIONS
+    # -------------------------
+    # имя в логе ввода -> метод; всё, что делает игрок, идёт через do()
+    ACTIONS = {
+        "click": "click",
+        "prestige": "prestige",
+        "kpi": "buy_kpi",
+        "auto": "buy_auto",
+        "building": "buy_building",
+        "meta": "buy_meta",
+        "autobuy": "set_autobuy",
+        "skip": "skip",
+    }
+
+    def do(self, action, *args):
+        """Действие игрока: пишется в input_log (если он есть) и выполняется."""
+        if self.input_log is not None:
+            self.input_log.record(self.ticks, action, args)
+        return getattr(self, self.ACTIONS[action])(*args)
+
+    def click(self, n=1):
+        """n кликов одним начислением (все в один момент: один Тащер-режим и доход)."""
+        state = self.state
+        mult = 5 if self.is_taisher_now() else 1
+        m = self.income_mult()
+        self.add_boxes_earned((state["kpi"] * mult) * m * n)
+        self.add_salary((CLICK_SALARY * mult) * m * n)
+        state["clicks"] += n
+        self.touch("clicks")
+
+        # chance penalty: 1/20 на клик; для пачки — сразу число штрафов
+        rng = self.rng["clicks"]
+        if n == 1:
+            fined = rng.randint(1, 20) == 1
+        else:
+            fined = binomial(rng, n, CLICK_PENALTY_CHANCE)
+        if fined:
+            self.add_salary(-CLICK_PENALTY * fined)
+
+    def prestige(self):
+        state = self.state
+        if state["salary"] < PRESTIGE_MIN_SALARY:
+            return 0
+
+        gained = max(1, int((state["salary"].floor() / PRESTIGE_MIN_SALARY).sqrt()))
+        state["prestige"] += gained
+        self.touch("prestige", "kpi", "total_buildings")
+        self.recalc_prestige_mult()
+
+        self.notify(f"+{gained} жетонов престижа!", (255, 0, 200))
+        self.toast(f"Перерождение! +{gained} престиж", 4.0)
+
+        # reset progress
+        state["boxes"] = Big(0)
+        state["salary"] = Big(0)
+        state["kpi"] = 1
+        state["upgrade_goal"] = Big(KPI_GOAL_START)
+        state["auto_click"] = False
+        self.scheduler.cancel("auto")
+        for b in self.buildings:
+            b.count = 0
+        self.shop_changes += 1
+
+        self.sync_rank()
+        state["flash"] = FLASH_TIME
+        if self.autobuyer:
+            self.autobuyer.rebuild()
+        return gained
+
+    def buy_kpi(self):
+        if self.state["salary"] >= KPI_UP_COST:
+            self.add_salary(-KPI_UP_COST)
+            self.state["kpi"] += 1
+            self.touch("kpi")
+            return True
+        return False
+
+    def buy_auto(self):
+        if self.state["salary"] >= AUTO_CLICK_COST:
+            self.add_salary(-AUTO_CLICK_COST)
+            self.state["auto_click"] = True
+            self._schedule_auto(self.now + AUTO_CLICK_INTERVAL)
+            if self.autobuyer:
+                self.autobuyer.rebuild()
+            self.toast("Авто включён", 2.7)
+            self.notify("Авто включён", (255, 210, 255))
+            return True
+        return False
+
+    def bulk_offer(self, idx, amount=1):
+        """(сколько купим, за сколько) для режима amount: число или BUY_MAX."""
+        b = self.buildings[idx]
+        disc = self.discount_mult()
+        if amount == BUY_MAX:
+            n = max(1, b.max_affordable(self.state["salary"], disc))
+        else:
+            n = int(amount)
+        return n, b.bulk_price(n, disc)
+
+    def buy_building(self, idx, amount=1, quiet=False):
+        # quiet — без тостов (авто-закупка покупает часто)
+        b = self.buildings[idx]
+        n, price = self.bulk_offer(idx, amount)
+        if self.state["salary"] >= price:
+            self.add_salary(-price)
+            b.count += n
+            self.shop_changes += 1
+            self.touch("total_buildings")
+            self.invalidate_income()
+            if self.autobuyer:
+                self.autobuyer.building_changed(idx)
+            if not quiet:
+                text = f"Куплено: {b.name}" if n == 1 else f"Куплено: {b.name} x{n}"
+                self.toast(text, 2.3)
+                self.notify(text, (255, 215, 0))
+            return True
+        if not quiet:
+            self.toast("Не хватает денег", 2.0)
+        return False
+
+    def buy_meta(self, key):
+        state = self.state
+        item = next(it for it in META_ITEMS if it["key"] == key)
+        cost = self.meta_cost(key, item["base_cost"])
+        if state["prestige"] >= cost:
+            state["prestige"] -= cost
+            state["meta"][key] = state["meta"].get(key, 0) + 1
+            self.shop_changes += 1
+            self.recalc_prestige_mult()
+            if self.autobuyer:
+                self.autobuyer.rebuild()  # скидка меняет цены всех зданий
+            self.toast(f"Куплено: {item['title']}", 3.3)
+            self.notify(f"Куплено: {item['title']}", (255, 215, 0))
+            return True
+        self.toast("Не хватает престижа", 2.7)
+        return False
+
+    # -------------------------
+    # SAVE / LOAD
+    # -------------------------
+    def snapshot(self):
+        """Копия всего сохраняемого состояния — её можно отдать другому потоку.
+
+        Времена (next_*, boss) абсолютные по часам симуляции; при
+        загрузке они переводятся в «осталось сек» от saved_at.
+        """
+        state = self.state
+        return {
+            "version": SAVE_VERSION,
+            "saved_at": self.now,
+
+            "boxes": state["boxes"].to_json(),
+            "salary": state["salary"].to_json(),
+            "kpi": state["kpi"],
+            "upgrade_goal": state["upgrade_goal"].to_json(),
+            "auto_click": state["auto_click"],
+            "autobuy": state["autobuy"],
+            "prestige": state["prestige"],
+            "meta": dict(state["meta"]),
+            "buildings": {b.id: b.count for b in self.buildings},
+
+            # stats
+            "clicks": state["clicks"],
+            "earned_salary": state["earned_salary"].to_json(),
+            "boss_wins": state["boss_wins"],
+            "total_boxes_earned": self.total_boxes_earned.to_json(),
+            "unlocked": sorted(self.unlocked),
+
+            # timers
+            "event": {
+                "active": state["event_active"],
+                "text": state["event_text"],
+                "timer": state["event_timer"],
+                "mult": state["event_mult"],
+                "next": state["next_event_time"],
+            },
+            "loot": {
+                "active": state["loot_active"],
+                "timer": state["loot_timer"],
+                "next": state["next_loot_time"],
+            },
+            "boss": {
+                "active": self.boss_active,
+                "timer": self.boss_timer,
+                "goal": self.boss_goal,
+                "progress": float(self.total_boxes_earned - self.boss_start_earned),
+                "next": self.next_boss_time,
+            },
+        }
+
+    def save(self, path=SAVE_FILE):
+        # синхронно; в окне сейвы идут через save_io.SaveWriter
+        try:
+            atomic_write(path, encode_save(self.snapshot()))
+        except Exception as e:
+            print("[WARN] Save failed:", e)
+
+    def load(self, path=SAVE_FILE):
+        """Прочитать сейв и restore() его; возвращает данные сейва (или None)."""
+        data = read_with_fallback(path, decode_save)
+        if data is None and path == SAVE_FILE:
+            data = read_with_fallback(LEGACY_SAVE_FILE, decode_save)
+        if data is not None:
+            self.restore(data)
+        return data
+
+    def restore(self, data):
+        """Состояние из словаря сейва (+ оффлайн-прогресс от saved_at до self.now)."""
+        state = self.state
+        try:
+            state["boxes"] = Big.of(data.get("boxes", 0.0))
+            state["salary"] = Big.of(data.get("salary", 0.0))
+            state["kpi"] = int(data.get("kpi", 1))
+            state["upgrade_goal"] = Big.of(data.get("upgrade_goal", 100))
+            state["auto_click"] = bool(data.get("auto_click", False))
+            state["prestige"] = int(data.get("prestige", 0))
+            state["meta"].update(data.get("meta", {}))
+
+            saved_b = data.get("buildings", {})
+            for b in self.buildings:
+                b.count = int(saved_b.get(b.id, 0))
+            self.shop_changes += 1
+
+            state["clicks"] = int(data["clicks"])
+            state["earned_salary"] = Big.of(data["earned_salary"])
+            state["boss_wins"] = int(data["boss_wins"])
+            self.total_boxes_earned = Big.of(data["total_boxes_earned"])
+            # уже открытые достижения не всплывают заново
+            self.unlocked = {a["id"] for a in ACHIEVEMENTS} & set(data["unlocked"])
+
+            self.recalc_prestige_mult()
+            self.recalc_ach_mult()
+            self.touch(*ACH_STATS)
+            self.sync_rank()
+            if state["auto_click"]:
+                self._schedule_auto(self.now + AUTO_CLICK_INTERVAL)
+            self.set_autobuy(data.get("autobuy", False))
+
+            saved_at = data.get("saved_at")
+            if saved_at is not None:
+                self.apply_offline(self.now - float(saved_at))
+                self._restore_timers(data, float(saved_at))
+
+        except Exception as e:
+            print("[WARN] Load failed:", e)
+
+    def _restore_timers(self, data, saved_at):
+        # пока игра закрыта, события/босс стоят на паузе: переносим
+        # их на «столько же секунд от сейчас», сколько оставалось
+        state = self.state
+
+        def shift(t):
+            return self.now + max(0.0, float(t) - saved_at)
+
+        ev = data.get("event")
+        if ev:
+            state["event_active"] = bool(ev["active"])
+            state["event_text"] = ev["text"]
+            state["event_timer"] = float(ev["timer"])
+            state["event_mult"] = float(ev["mult"])
+            self.invalidate_income()
+            state["next_event_time"] = shift(ev["next"])
+            self.scheduler.schedule("event", state["next_event_time"], self._on_event_due)
+
+        loot = data.get("loot")
+        if loot:
+            state["loot_active"] = bool(loot["active"])
+            state["loot_timer"] = float(loot["timer"])
+            state["next_loot_time"] = shift(loot["next"])
+            if state["loot_active"]:
+                self.scheduler.cancel("loot")
+            else:
+                self.scheduler.schedule("loot", state["next_loot_time"], self._on_loot_due)
+
+        boss = data.get("boss")
+        if boss:
+            self.boss_active = bool(boss["active"])
+            self.boss_timer = float(boss["timer"])
+            self.boss_goal = int(boss["goal"])
+            # оффлайн-пики в проверку не засчитываем
+            self.boss_start_earned = self.total_boxes_earned - float(boss["progress"])
+            self.boss_progress = int(boss["progress"])
+            self.next_boss_time = shift(boss["next"])
+            if self.boss_active:
+                self.scheduler.cancel("boss")
+            else:
+                self.scheduler.schedule("boss", self.next_boss_time, self._on_boss_due)
@@ -0,0 +1,25 @@
+# ===============================
+# ФИОЛЕТОВАЯ СМЕНА: ОБЩЕЕ ДЛЯ ТЕСТОВ
+# ===============================
+# Сверки на тысячах случайных состояний: первое расхождение мало
+# что говорит, поэтому копим их (до limit) и падаем одним списком.
+
+
+class Mismatches:
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.items = []
+
+    def same(self, what, got, want):
+        """got == want; nan считается равным nan."""
+        if not (got == want or (got != got and want != want)):
+            self.items.append(f"{what}: {got!r} != {want!r}")
+
+    def fail(self, what):
+        self.items.append(what)
+
+    def full(self):
+        return len(self.items) > self.limit
+
+    def check(self):
+        assert not self.items, f"{len(self.items)} mismatches:\n  " + "\n  ".join(self.items[:self.limit])
@@ -0,0 +1,111 @@
+import random
+
+import simulation
+from bignum import Big
+from simulation import GameSimulation, RANKS
+
+
+def top_rank_sim(counts=(0, 0, 0, 0), salary=0.0):
+    # авто-клик куплен, KPI на последнем звании — в куче остаются только здания
+    sim = GameSimulation(now=0.0, seed=1)
+    sim.state["auto_click"] = True
+    sim.state["kpi"] = RANKS[-1].min_kpi
+    sim.sync_rank()
+    for b, c in zip(sim.buildings, counts):
+        b.count = c
+    sim.invalidate_income()
+    sim.state["salary"] = Big(salary)
+    sim.set_autobuy(True)
+    return sim
+
+
+def best_building(sim):
+    disc = sim.discount_mult()
+    return min(range(len(sim.buildings)),
+               key=lambda i: sim.buildings[i].price(disc) / sim.buildings[i].bps)
+
+
+def test_saves_up_for_best_payback():
+    sim = top_rank_sim(counts=(40, 0, 0, 0))
+    best = best_building(sim)
+    price = sim.buildings[best].price(sim.discount_mult())
+    assert best != 0
+    # сортировщик по карману, но копим на лучшее
+    sim.state["salary"] = price - 1
+    sim.autobuyer.tick()
+    assert sim.autobuyer.bought == 0
+    sim.state["salary"] = price
+    sim.autobuyer.tick()
+    assert sim.buildings[best].count == 1
+    assert sim.autobuyer.payback()[0] == best_building(sim)
+
+
+def test_heap_top_matches_brute_force():
+    rng = random.Random(3)
+    sim = top_rank_sim()
+    for _ in range(300):
+        idx = rng.randrange(len(sim.buildings))
+        sim.state["salary"] = Big(1e30)
+        sim.buy_building(idx, rng.choice([1, 5, 25]), quiet=True)
+        assert sim.autobuyer.payback()[0] == best_building(sim)
+
+
+def test_buys_auto_click_when_it_pays_back_first():
+    # каждое здание уже дороже 5083 за 1 bps, авто окупается быстрее
+    sim = top_rank_sim(counts=(20, 17, 14, 12))
+    sim.state["auto_click"] = False
+    sim.set_autobuy(True)
+    assert sim.autobuyer.payback()[0] == "auto"
+    sim.state["salary"] = Big(simulation.AUTO_CLICK_COST)
+    sim.autobuyer.tick()
+    assert sim.state["auto_click"]
+    assert sim.autobuyer.payback()[0] == best_building(sim)
+
+
+def test_buys_kpi_toward_next_rank():
+    # с таким bps +5% следующего звания окупаются быстрее любого здания
+    sim = GameSimulation(now=0.0, seed=1)
+    for b, c in zip(sim.buildings, (20, 17, 14, 12)):
+        b.count = c
+    sim.invalidate_income()
+    sim.set_autobuy(True)
+    assert sim.autobuyer.payback()[0] == "kpi"
+    sim.state["salary"] = Big(simulation.KPI_UP_COST)
+    sim.autobuyer.tick()
+    assert sim.state["kpi"] == 2
+
+
+def test_limited_buys_per_tick():
+    sim = top_rank_sim(salary=1e60)
+    sim.autobuyer.tick()
+    assert sim.autobuyer.bought == simulation.AutoBuyer.MAX_BUYS_PER_TICK
+
+
+def test_purchases_bump_shop_changes():
+    sim = top_rank_sim(salary=1e6)
+    before = sim.shop_changes
+    sim.autobuyer.tick()
+    assert sim.shop_changes - before == sim.autobuyer.bought > 0
+
+
+def test_correct_past_float_range():
+    # цены за 1e308: float(цена) — inf, но выбор всё ещё по цене / bps
+    sim = top_rank_sim(counts=(5700, 5660, 5620, 5580))
+    assert float(sim.buildings[0].price()) == float("inf")
+    best = best_building(sim)
+    assert sim.autobuyer.payback()[0] == best
+    sim.state["salary"] = Big.from_log10(400)
+    sim.autobuyer.tick()
+    assert sim.buildings[best].count > (5700, 5660, 5620, 5580)[best]
+
+
+def test_meta_skips_losing_income_upgrade():
+    # +10% дохода за 3 жетона теряет 3 x 5% — не берём никогда;
+    # скидка при большом престиже окупается
+    sim = top_rank_sim()
+    sim.state["prestige"] = 40
+    sim.recalc_prestige_mult()
+    sim.autobuyer.tick()
+    assert sim.state["meta"]["income"] == 0
+    assert sim.state["meta"]["cheap"] >= 1
+    assert sim.state["prestige"] < 40
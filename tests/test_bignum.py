@@ -0,0 +1,79 @@
+import math
+import random
+
+from bignum import Big, fmt_big
+
+from tests.helpers import Mismatches
+
+
+def rand_float(rng):
+    # от 1e-12 до 1e150 обоих знаков, иногда целые и ноль
+    r = rng.random()
+    if r < 0.05:
+        return 0.0
+    if r < 0.3:
+        return float(rng.randint(-10 ** 6, 10 ** 6))
+    return rng.choice((1.0, -1.0)) * 10 ** rng.uniform(-12, 150)
+
+
+def test_matches_float_bit_for_bit():
+    # пока результат влезает во float, арифметика и сравнения — как у float
+    rng = random.Random(1)
+    m = Mismatches()
+    for _ in range(20000):
+        a, b = rand_float(rng), rand_float(rng)
+        x, y = Big(a), Big(b)
+        m.same(f"{a!r} + {b!r}", float(x + y), a + b)
+        m.same(f"{a!r} + float {b!r}", float(x + b), a + b)
+        m.same(f"{a!r} + int {int(b)}", float(x + int(b)), a + int(b))
+        m.same(f"{a!r} - {b!r}", float(x - y), a - b)
+        m.same(f"{a!r} * {b!r}", float(x * y), a * b)
+        if b:
+            m.same(f"{a!r} / {b!r}", float(x / y), a / b)
+        m.same(f"sqrt {abs(a)!r}", float(abs(x).sqrt()), math.sqrt(abs(a)))
+        m.same(f"floor {a!r}", float(x.floor()), float(math.floor(a)))
+        m.same(f"{a!r} < {b!r}", x < y, a < b)
+        m.same(f"{a!r} == {b!r}", x == b, a == b)
+        m.same(f"{a!r} >= float {b!r}", x >= b, a >= b)
+        m.same(f"to_json {a!r}", float(Big.of(x.to_json())), a)
+        if a:
+            lg = x.log10()
+            if abs(lg - math.log10(abs(a))) > 1e-12 * max(1.0, abs(lg)):
+                m.fail(f"log10 {a!r}: {lg!r} != {math.log10(abs(a))!r}")
+        if m.full():
+            break
+    m.check()
+
+
+def test_past_float_range():
+    # за 1e308: без inf, порядок и log10 сохраняются, сейв [m, e] обратим
+    rng = random.Random(2)
+    m = Mismatches()
+    prev = None
+    for k in range(300, 5000, 7):
+        v = Big.from_log10(k + rng.random())
+        w = v * v + v
+        if not math.isfinite(v.m) or w <= v:
+            m.fail(f"1e{k}: {v!r} -> {w!r}")
+        if abs(Big.pow(10.0, k).log10() - k) > 1e-9:
+            m.fail(f"pow 10**{k}: {Big.pow(10.0, k)!r}")
+        if Big.of(v.to_json()) != v:
+            m.fail(f"to_json 1e{k}: {v.to_json()!r}")
+        if prev is not None and not prev < v:
+            m.fail(f"order 1e{k}: {prev!r} !< {v!r}")
+        prev = v
+    m.check()
+
+
+def test_huge_ints():
+    n = 3 ** 2000
+    b = Big.of(n)
+    assert abs(b.log10() - 2000 * math.log10(3)) < 1e-9
+    assert float(b + 1) == math.inf
+    assert Big.of(n) + 7 == b
+
+
+def test_fmt_big():
+    assert fmt_big(999999) == "999 999"
+    assert fmt_big(1.5e6) == "1.50M"
+    assert fmt_big(Big.from_log10(45.5)) == "3.16e45"
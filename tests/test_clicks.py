@@ -0,0 +1,120 @@
+import math
+import os
+import random
+import sys
+
+import pytest
+
+import simulation
+from simulation import GameSimulation, CLICK_PENALTY, CLICK_PENALTY_CHANCE, CLICK_SALARY, binomial
+
+
+# -------------------------
+# BINOMIAL PENALTY
+# -------------------------
+def test_binomial_edges():
+    rng = random.Random(1)
+    assert binomial(rng, 0, 0.5) == 0
+    assert binomial(rng, 100, 0.0) == 0
+    assert binomial(rng, 100, 1.0) == 100
+    assert all(0 <= binomial(rng, 7, 0.3) <= 7 for _ in range(1000))
+
+
+def test_binomial_distribution():
+    # среднее n*p и дисперсия n*p*(1-p) в пределах 4 сигм выборки
+    rng = random.Random(2)
+    n, p, runs = 500, CLICK_PENALTY_CHANCE, 20000
+    xs = [binomial(rng, n, p) for _ in range(runs)]
+    mean = sum(xs) / runs
+    var = sum((x - mean) ** 2 for x in xs) / (runs - 1)
+    assert abs(mean - n * p) < 4 * math.sqrt(n * p * (1 - p) / runs)
+    assert abs(var / (n * p * (1 - p)) - 1) < 0.05
+
+
+def test_batch_click_pays_once_minus_binomial_fines():
+    sim = GameSimulation(now=0.0, seed=5)
+    twin = random.Random()
+    twin.setstate(sim.rng["clicks"].getstate())
+    m = sim.income_mult() * (5 if sim.is_taisher_now() else 1)
+    salary0, boxes0 = sim.state["salary"], sim.state["boxes"]
+    sim.click(500)
+    fined = binomial(twin, 500, CLICK_PENALTY_CHANCE)
+    assert fined > 0
+    assert sim.state["clicks"] == 500
+    assert sim.state["salary"] == salary0 + CLICK_SALARY * m * 500 - CLICK_PENALTY * fined
+    assert sim.state["boxes"] == boxes0 + sim.state["kpi"] * m * 500
+
+
+def test_batch_matches_single_clicks(monkeypatch):
+    # без штрафов пачка == столько же одиночных кликов (до округления)
+    monkeypatch.setattr(simulation, "CLICK_PENALTY_CHANCE", 0.0)
+    one, many = GameSimulation(now=0.0, seed=1), GameSimulation(now=0.0, seed=1)
+    one.rng["clicks"].randint = lambda a, b: b  # одиночный штраф — randint(1, 20) == 1
+    for _ in range(300):
+        one.click()
+    many.click(300)
+    assert one.state["clicks"] == many.state["clicks"]
+    assert math.isclose(float(one.state["boxes"]), float(many.state["boxes"]), rel_tol=1e-12)
+    assert math.isclose(float(one.state["salary"]), float(many.state["salary"]), rel_tol=1e-12)
+
+
+# -------------------------
+# EVENT COALESCING (main.handle_input)
+# -------------------------
+class ActionLog:
+    def __init__(self):
+        self.actions = []
+
+    def record(self, tick, action, args=()):
+        self.actions.append([action, *args])
+
+
+@pytest.fixture(scope="module")
+def game(tmp_path_factory):
+    pygame = pytest.importorskip("pygame")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    cwd, argv = os.getcwd(), sys.argv
+    # main при импорте читает save.dat из cwd — пусть читает пустую папку
+    os.chdir(tmp_path_factory.mktemp("game"))
+    sys.argv = ["main.py"]
+    try:
+        import main
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+    yield main
+    pygame.event.clear()
+
+
+@pytest.fixture
+def sim(game):
+    s = GameSimulation(now=0.0, seed=3)
+    s.input_log = ActionLog()
+    game.use_sim(s)
+    game.meta_open = False
+    return s
+
+
+def press(game, btn, times=1):
+    import pygame
+    for _ in range(times):
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=btn.base_rect.center, button=1))
+
+
+def test_clicks_in_a_frame_coalesce(game, sim):
+    press(game, game.btn_click, 250)
+    game.handle_input(False)
+    assert sim.input_log.actions == [["click", 250]]
+    assert sim.state["clicks"] == 250
+
+
+def test_other_input_flushes_clicks_in_order(game, sim):
+    sim.state["salary"] += 1e6
+    press(game, game.btn_click, 3)
+    press(game, game.building_btns[0])
+    press(game, game.btn_click, 2)
+    game.handle_input(False)
+    assert [a[0] for a in sim.input_log.actions] == ["click", "building", "click"]
+    assert sim.input_log.actions[0] == ["click", 3]
+    assert sim.input_log.actions[2] == ["click", 2]
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import economy_np as enp
+from bignum import Big
+from simulation import GameSimulation, KPI_GOAL_START, KPI_GOAL_GROWTH
+
+from tests.helpers import Mismatches
+
+
+def random_rows(rng, samples):
+    return [{
+        "counts": [rng.randint(0, 500) for _ in enp.BUILDING_IDS],
+        "cheap": rng.randint(0, 9),
+        "income": rng.randint(0, 12),
+        "prestige": rng.randint(0, 5000),
+        "kpi": rng.randint(1, 600),
+        "n": rng.choice([0, 1, 2, 10, 100, rng.randint(0, 300)]),
+        "money": float(10 ** rng.uniform(0, 40)),
+    } for _ in range(samples)]
+
+
+def test_matches_scalar_simulation():
+    # бит в бит со скалярным simulation.py на случайных состояниях
+    rows = random_rows(random.Random(1), 20000)
+    counts = np.array([r["counts"] for r in rows])
+    cheap = np.array([r["cheap"] for r in rows])
+    disc = enp.discount_mult(cheap)
+    n = np.array([r["n"] for r in rows])
+    money = np.array([r["money"] for r in rows])
+    inc = enp.income_table(counts, np.array([r["prestige"] for r in rows]),
+                           np.array([r["income"] for r in rows]), np.array([r["kpi"] for r in rows]))
+    prices = enp.price(enp.BASE_PRICE, counts, disc[:, None])
+    bulks = enp.bulk_price(enp.BASE_PRICE, counts, n[:, None], disc[:, None])
+    maxes = enp.max_affordable(money[:, None], enp.BASE_PRICE, counts, disc[:, None])
+    costs = enp.meta_cost(3, cheap)
+
+    sim = GameSimulation(now=0.0, seed=1)
+    st = sim.state
+    m = Mismatches()
+    for i, r in enumerate(rows):
+        st["meta"].update({"cheap": r["cheap"], "income": r["income"]})
+        st["prestige"] = r["prestige"]
+        st["kpi"] = r["kpi"]
+        for b, c in zip(sim.buildings, r["counts"]):
+            b.count = c
+        sim.recalc_prestige_mult()
+        sim.sync_rank()
+        d = sim.discount_mult()
+        m.same(f"discount {r['cheap']}", float(disc[i]), d)
+        m.same(f"meta_cost {r['cheap']}", int(costs[i]), sim.meta_cost("cheap", 3))
+        want = sim.income_breakdown()
+        for key in ("prestige", "rank", "total", "base_bps", "bps"):
+            m.same(f"income[{key}] #{i}", float(inc[key][i]), float(want[key]))
+        for j, b in enumerate(sim.buildings):
+            m.same(f"price {b.id}x{b.count}", float(prices[i, j]), float(b.price(d)))
+            m.same(f"bulk {b.id}x{b.count}+{r['n']}", float(bulks[i, j]), float(b.bulk_price(r["n"], d)))
+            m.same(f"max {b.id}x{b.count} ${r['money']:.3g}", int(maxes[i, j]), b.max_affordable(r["money"], d))
+        if m.full():
+            break
+    m.check()
+
+
+def test_kpi_curve_matches_step():
+    # цели KPI — прогоном, как в GameSimulation.step
+    m = Mismatches()
+    goal = Big(KPI_GOAL_START)
+    goals = enp.kpi_goals(400)
+    for k in range(1, 401):
+        m.same(f"kpi_goal {k}", float(goals[k]), float(goal))
+        goal = (goal * KPI_GOAL_GROWTH).floor()
+    cum = enp.boxes_to_kpi(400)
+    m.same("boxes_to_kpi 2", cum[2], goals[1])
+    m.same("boxes_to_kpi 3", cum[3], goals[1] + goals[2])
+    m.check()
+
+
+def test_ipow_matches_python_pow():
+    # np.power расходится с ** в последнем бите — таблица должна совпадать точно
+    got = enp.ipow(1.15, np.arange(6000))
+    for i in (0, 1, 2, 77, 1000, 5000):
+        assert got[i] == 1.15 ** i
+    assert got[5999] == float("inf")
@@ -0,0 +1,50 @@
+import math
+import time
+
+import pytest
+
+from simulation import GameSimulation, TICK
+
+
+def quiet_sim(counts=(20, 10, 4, 1), auto=True):
+    # без событий, лута и проверок: оффлайн их не считает
+    sim = GameSimulation(now=0.0, seed=2)
+    for name in ("event", "loot", "boss"):
+        sim.scheduler.cancel(name)
+    for b, c in zip(sim.buildings, counts):
+        b.count = c
+    sim.invalidate_income()
+    sim.state["salary"] *= 0
+    if auto:
+        sim.state["auto_click"] = True
+        sim._schedule_auto(sim.now + 1.0)
+    # достижения оффлайн не открываются — держим их одинаковыми: KPI 25
+    # открыт заранее, build_10 откроется на первом тике
+    sim.unlocked.add("kpi_25")
+    sim.recalc_ach_mult()
+    sim.step(TICK)
+    return sim
+
+
+@pytest.mark.parametrize("seconds", [60.0, 1800.0])
+@pytest.mark.parametrize("auto", [False, True])
+def test_offline_matches_stepped(seconds, auto):
+    # звания растут вместе с KPI — множитель звания должен доходить и оффлайн
+    stepped, offline = quiet_sim(auto=auto), quiet_sim(auto=auto)
+    stepped.advance(seconds)
+    offline.apply_offline(seconds)
+    a, b = stepped.state, offline.state
+    assert abs(a["kpi"] - b["kpi"]) <= 1
+    assert math.isclose(float(a["salary"]), float(b["salary"]), rel_tol=0.005)
+    assert math.isclose(float(stepped.total_boxes_earned), float(offline.total_boxes_earned), rel_tol=0.005)
+
+
+def test_offline_summary_and_speed():
+    sim = quiet_sim()
+    kpi0, salary0 = sim.state["kpi"], sim.state["salary"]
+    t0 = time.perf_counter()
+    summary = sim.apply_offline(30 * 86400)
+    elapsed = time.perf_counter() - t0
+    assert summary["kpi"] == sim.state["kpi"] - kpi0 > 0
+    assert sim.state["salary"] == salary0 + summary["salary"]
+    assert elapsed < 0.01  # цикл по апгрейдам KPI, а не по кадрам
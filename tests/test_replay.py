@@ -0,0 +1,75 @@
+import json
+import os
+import subprocess
+import sys
+
+from replay import InputLog, digest, read_log, replay
+from simulation import GameSimulation, TICK
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# сейв, после загрузки которого в первом же тике открываются сразу
+# несколько достижений (как у старого save.json)
+SAVE = {
+    "boxes": 500.0, "salary": 250000.0, "kpi": 30, "upgrade_goal": 90000,
+    "auto_click": True, "prestige": 2, "meta": {"income": 1, "cheap": 1},
+    "buildings": {"sorter": 12, "buffer": 6, "mezz": 2, "autosort": 1},
+    "clicks": 40, "earned_salary": 900000.0, "boss_wins": 1,
+    "total_boxes_earned": 70000.0, "unlocked": [],
+}
+
+# повтор в отдельном процессе: порядок обхода множеств зависит от PYTHONHASHSEED
+REPLAY_SCRIPT = """
+import json, sys
+from replay import read_log, replay, digest
+sim, _ = replay(*read_log(sys.argv[1]))
+m = sim.ach_mult
+sim.recalc_ach_mult()
+print(json.dumps({"digest": digest(sim), "ach_mult": repr(m), "recalc": repr(sim.ach_mult),
+                  "unlocked": sorted(sim.unlocked)}))
+"""
+
+
+def record_session(path, ticks=3000):
+    sim = GameSimulation(now=0.0, seed=11)
+    sim.restore(json.loads(json.dumps(SAVE)))
+    log = InputLog(path)
+    log.start(sim, save=SAVE)
+    for i in range(ticks):
+        if i % 7 == 0:
+            sim.do("click", 1 + i % 5)
+        if i % 400 == 0:
+            sim.do("building", i // 400 % 4, 1)
+        if i == 1500:
+            sim.do("skip", 300.0)
+        sim.step(TICK)
+    log.close(sim)
+    return sim
+
+
+def run_replay(path, hash_seed):
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed), PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-c", REPLAY_SCRIPT, path], env=env, cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def test_replay_matches_recording(tmp_path):
+    path = str(tmp_path / "session.psilog")
+    live = record_session(path)
+    sim, expected = replay(*read_log(path))
+    assert digest(sim) == expected == digest(live)
+    assert sim.ach_mult == live.ach_mult
+
+
+def test_replay_independent_of_hash_seed(tmp_path):
+    # несколько достижений в одном тике: мультик и итог не зависят от хэш-сида
+    path = str(tmp_path / "session.psilog")
+    record_session(path)
+    # на старом коде сиды 10 и 12 давали другой ach_mult, чем 0 и 1
+    runs = [run_replay(path, seed) for seed in (0, 1, 10, 12)]
+    assert len(runs[0]["unlocked"]) >= 3
+    for run in runs:
+        assert run == runs[0]
+        assert run["ach_mult"] == run["recalc"]
+    assert runs[0]["digest"] == read_log(path)[1][-1][2]
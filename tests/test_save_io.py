@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from bignum import Big
+from save_io import (
+    SAVE_VERSION, atomic_write, decode_save, encode_save, read_with_fallback, rotate_backups,
+)
+from simulation import GameSimulation
+
+# сейв из версии до save.dat: main.save_game() писал ровно эти ключи
+LEGACY_SAVE = {
+    "boxes": 1234.5,
+    "salary": 98765.25,
+    "kpi": 17,
+    "upgrade_goal": 4321,
+    "auto_click": True,
+    "prestige": 3,
+    "meta": {"income": 1, "cheap": 2, "taisher": 0, "events": 0},
+    "buildings": {"sorter": 12, "buffer": 5, "mezz": 1, "autosort": 0},
+}
+
+
+@pytest.fixture
+def legacy_path(tmp_path):
+    # v1: indent-JSON без версии, как писала старая игра
+    path = tmp_path / "save.json"
+    path.write_text(json.dumps(LEGACY_SAVE, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def played():
+    # снимок с числами за 1e308, достижением и идущими таймерами
+    sim = GameSimulation(now=1000.0, seed=1)
+    for b in sim.buildings:
+        b.count = 5
+    sim.state["auto_click"] = True
+    sim.state["salary"] = Big.from_log10(420.5)
+    sim.state["earned_salary"] = Big.from_log10(421.25)
+    sim.unlocked.add("first_click")
+    sim.recalc_ach_mult()
+    sim.advance(30.0)
+    return sim
+
+
+def test_v1_migrates_to_current(legacy_path):
+    with open(legacy_path, "rb") as f:
+        data = decode_save(f.read())
+    assert data["version"] == SAVE_VERSION
+    for key in ("clicks", "earned_salary", "boss_wins", "total_boxes_earned", "unlocked"):
+        assert key in data
+
+
+def test_v1_loads_into_simulation(legacy_path):
+    sim = GameSimulation(now=1000.0, seed=1)
+    sim.load(legacy_path)
+    st = sim.state
+    assert float(st["boxes"]) == LEGACY_SAVE["boxes"]
+    assert float(st["salary"]) == LEGACY_SAVE["salary"]
+    assert st["kpi"] == LEGACY_SAVE["kpi"]
+    assert float(st["upgrade_goal"]) == LEGACY_SAVE["upgrade_goal"]
+    assert st["auto_click"] is True
+    assert st["prestige"] == LEGACY_SAVE["prestige"]
+    assert {k: st["meta"][k] for k in LEGACY_SAVE["meta"]} == LEGACY_SAVE["meta"]
+    assert {b.id: b.count for b in sim.buildings} == LEGACY_SAVE["buildings"]
+
+
+def test_round_trip(played):
+    snap = played.snapshot()
+    assert decode_save(encode_save(snap)) == snap
+
+
+def test_restore_gives_same_state(played, tmp_path):
+    snap = played.snapshot()
+    path = str(tmp_path / "save.dat")
+    atomic_write(path, encode_save(snap))
+    again = GameSimulation(now=played.now, seed=1)
+    again.load(path)
+    # уже наступившие таймеры при загрузке переносятся на «сейчас»
+    want = json.loads(json.dumps(snap))
+    for key in ("event", "loot", "boss"):
+        want[key]["next"] = max(snap["saved_at"], snap[key]["next"])
+    assert again.snapshot() == want
+    assert again.ach_mult == played.ach_mult
+
+
+def test_corrupt_save_falls_back_to_backup(played, tmp_path):
+    snap = played.snapshot()
+    raw = encode_save(snap)
+    broken = raw[:-1] + bytes([raw[-1] ^ 0xFF])
+    with pytest.raises(ValueError):
+        decode_save(broken)
+
+    path = str(tmp_path / "save.dat")
+    atomic_write(path, raw)
+    rotate_backups(path)
+    atomic_write(path, broken)
+    assert read_with_fallback(path, decode_save) == snap
+
+
+def test_newer_version_rejected(played):
+    future = dict(played.snapshot(), version=SAVE_VERSION + 1)
+    with pytest.raises(ValueError):
+        decode_save(encode_save(future))
@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+
+from save_io import SaveWriter, backup_paths, decode_json, decode_save, encode_json
+
+
+def read(path, decode=decode_save):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def test_default_format_is_save_dat(tmp_path):
+    path = str(tmp_path / "save.dat")
+    w = SaveWriter(path)
+    w.submit({"version": 2, "kpi": 3})
+    w.close()
+    assert read(path)["kpi"] == 3
+
+
+def test_pending_snapshots_coalesce(tmp_path):
+    # пока поток пишет первый снимок, следующие перезаписывают ожидающий
+    path = str(tmp_path / "save.json")
+    started, release = threading.Event(), threading.Event()
+
+    def slow_encode(data):
+        started.set()
+        release.wait(5)
+        return encode_json(data)
+
+    w = SaveWriter(path, encode=slow_encode)
+    w.submit({"n": 1})
+    assert started.wait(5)
+    for n in (2, 3, 4):
+        w.submit({"n": n})
+    release.set()
+    w.close()
+    assert w.writes == 2
+    assert read(path, decode_json) == {"n": 4}
+
+
+def test_unchanged_snapshot_skipped(tmp_path):
+    path = str(tmp_path / "save.json")
+    w = SaveWriter(path, encode=encode_json)
+    w.submit({"kpi": 1, "saved_at": 10.0})
+    w.flush()
+    w.submit({"kpi": 1, "saved_at": 20.0})  # отличается только ignore_keys
+    w.flush()
+    w.submit({"kpi": 2, "saved_at": 30.0})
+    w.close()
+    assert (w.writes, w.skipped) == (2, 1)
+    assert read(path, decode_json)["kpi"] == 2
+
+
+def test_backups_rotate(tmp_path):
+    path = str(tmp_path / "save.json")
+    w = SaveWriter(path, encode=encode_json, backup_every=0.0, backups=2)
+    for kpi in (1, 2, 3, 4):
+        w.submit({"kpi": kpi})
+        w.flush()
+    w.close()
+    bak1, bak2 = backup_paths(path, 2)
+    assert [read(p, decode_json)["kpi"] for p in (path, bak1, bak2)] == [4, 3, 2]
+
+
+def test_backup_only_every_interval(tmp_path):
+    # первая запись бэкапит сейв прошлой сессии, дальше — раз в backup_every
+    path = str(tmp_path / "save.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"kpi": 0}, f)
+    w = SaveWriter(path, encode=encode_json, backup_every=3600.0, backups=2)
+    for kpi in (1, 2, 3):
+        w.submit({"kpi": kpi})
+        w.flush()
+    w.close()
+    bak1, bak2 = backup_paths(path, 2)
+    assert read(bak1, decode_json) == {"kpi": 0}
+    assert not os.path.exists(bak2)
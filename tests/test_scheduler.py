@@ -0,0 +1,65 @@
+from simulation import Scheduler
+
+
+def recorder(log, name):
+    return lambda at: log.append((name, at))
+
+
+def test_runs_due_in_time_order():
+    s = Scheduler()
+    log = []
+    s.schedule("c", 3.0, recorder(log, "c"))
+    s.schedule("a", 1.0, recorder(log, "a"))
+    s.schedule("b", 2.0, recorder(log, "b"))
+    assert s.next_time() == 1.0
+    assert s.run_due(2.5) == 2
+    assert log == [("a", 1.0), ("b", 2.0)]
+    assert "c" in s and "a" not in s
+    assert s.next_time() == 3.0
+
+
+def test_same_time_keeps_schedule_order():
+    s = Scheduler()
+    log = []
+    for name in ("x", "y", "z"):
+        s.schedule(name, 5.0, recorder(log, name))
+    s.run_due(5.0)
+    assert [n for n, _ in log] == ["x", "y", "z"]
+
+
+def test_reschedule_replaces_old_entry():
+    s = Scheduler()
+    log = []
+    s.schedule("boss", 1.0, recorder(log, "old"))
+    s.schedule("boss", 4.0, recorder(log, "new"))
+    assert len(s) == 1
+    assert s.next_time() == 4.0
+    assert s.run_due(3.0) == 0
+    s.run_due(4.0)
+    assert log == [("new", 4.0)]
+
+
+def test_cancel():
+    s = Scheduler()
+    log = []
+    s.schedule("loot", 1.0, recorder(log, "loot"))
+    s.cancel("loot")
+    s.cancel("missing")
+    assert s.next_time() is None
+    assert s.run_due(10.0) == 0
+    assert log == [] and len(s) == 0
+
+
+def test_callback_can_reschedule_itself():
+    # автоклик: callback получает плановое время и ставит следующее от него
+    s = Scheduler()
+    fired = []
+
+    def tick(at):
+        fired.append(at)
+        s.schedule("auto", at + 1.0, tick)
+
+    s.schedule("auto", 1.0, tick)
+    assert s.run_due(3.5) == 3
+    assert fired == [1.0, 2.0, 3.0]
+    assert s.next_time() == 4.0